@@ -0,0 +1,723 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from google_play_scraper import search as gp_search, app as gp_app
+from playwright.async_api import async_playwright, TimeoutError
+
+from browser_pool import BROWSER_ARGS, DEFAULT_USER_AGENT, resource_block_policy, blocked_types, is_blocked_request
+from http_client import DEFAULT_HEADERS, DEFAULT_TIMEOUT, THROTTLE_STATUSES, http_settings, host_concurrency, is_captcha_url
+from rate_limiter import get_limiter, report_throttle, report_url_throttle
+from circuit_breaker import get_breaker
+from version_cache import get_version_cache, detail_key
+from metrics import record_wait
+from timeouts import measured, timeout_ms, request_timeout
+from stores import STORES, enabled_stores, async_store_search, normalize_record, store_for_url
+from search import (
+    _wait_timeouts, _known_cards, EMPTY_RESULTS_SELECTOR, _capture_responses, _galaxy_apps_from_json, _huawei_apps_from_json,
+    _select_xiaomi_global_cards, _select_xiaomi_getapps_cards, _select_galaxy_cards, _select_huawei_cards,
+    _xiaomi_global_version, _xiaomi_getapps_version, _galaxy_version_from_text,
+    _XIAOMI_GLOBAL_CARDS_JS, _XIAOMI_GETAPPS_CARDS_JS, _GALAXY_CARDS_JS, _HUAWEI_TEXTS_JS,
+    GALAXY_API_PATTERN, HUAWEI_API_PATTERN, XIAOMI_GLOBAL_VERSION_SELECTOR, HUAWEI_VERSION_XPATH, HUAWEI_DEVELOPER_XPATH,
+    APP_STORE_SEARCH_URL, parse_app_store_results, google_play_record, google_play_app_url, google_play_version_url, parse_google_play_version,
+    rustore_search_url, parse_rustore_search, parse_rustore_version,
+    xiaomi_global_search_url, xiaomi_getapps_search_url, galaxy_search_url, huawei_search_url
+)
+
+# Коды ответа, при которых HTTP-запрос повторяется (как в http_client)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Функция возвращает причину, по которой движок asyncio нельзя запустить (пустая строка - можно)
+def async_engine_unavailable():
+    if aiohttp is None:
+        return "не установлен пакет aiohttp"
+    return ""
+
+# Асинхронный движок опроса магазинов: один цикл событий, один aiohttp-клиент и один
+# браузер Playwright (async API) на все ключевые слова. Одновременность ограничивается
+# семафорами по магазинам и числом ключевых слов в работе, а не числом потоков.
+# known - предикат известных приложений парсера для браузерных магазинов (см. search._known_cards).
+class AsyncStoreEngine:
+    def __init__(self, config, limits, stop_event=None, known=None):
+        self.config = config
+        self.limits = limits
+        self.stop_event = stop_event or threading.Event()
+        self.known = known
+        self.detail_pages = max(1, int(config.get("browser_detail_pages", 4)))
+        self.max_pages = config.get("browser_max_pages", 200)
+        self.block_policy = resource_block_policy(config)
+        # Одновременность по магазинам: значение из реестра или переопределение из конфигурации
+        overrides = config.get("async_store_concurrency", {})
+        self.store_concurrency = {store.name: max(1, int(overrides.get(store.name, store.concurrency))) for store in STORES}
+        self.keyword_concurrency = max(1, int(config.get("async_keyword_concurrency", 4)))
+        self.pages_served = 0
+        # Примитивы asyncio создаются внутри работающего цикла событий
+        self._store_semaphores = {}
+        self._host_semaphores = {}
+        self._inflight = {}
+        self._http = None
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._open_contexts = 0
+
+    # ---------- HTTP ----------
+
+    def _http_session(self):
+        if self._http is None:
+            settings = http_settings()
+            per_host = max([settings["host_concurrency"]] + list(settings["host_limits"].values()))
+            connector = aiohttp.TCPConnector(limit=settings["pool_size"] * len(STORES), limit_per_host=per_host)
+            self._http = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+            )
+        return self._http
+
+    # Ограничение одновременных запросов к хосту - те же лимиты, что у http_client
+    def _host_semaphore(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(host_concurrency(url))
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    # GET-запрос с повторами на 429/5xx и сетевых ошибках (настройки - из http_client,
+    # таймаут - адаптивный таймаут магазина)
+    async def _fetch(self, url, params=None, as_json=False):
+        settings = http_settings()
+        retries = settings["retries"]
+        proxy = settings["proxy"] or None
+        session = self._http_session()
+        store = store_for_url(url)
+        async with self._host_semaphore(url):
+            for attempt in range(retries + 1):
+                try:
+                    timeout = aiohttp.ClientTimeout(total=request_timeout(url))
+                    with measured(store, "http"):
+                        async with session.get(url, params=params, proxy=proxy, timeout=timeout) as response:
+                            if response.status in THROTTLE_STATUSES:
+                                report_url_throttle(url, f"HTTP {response.status}")
+                            elif is_captcha_url(str(response.url)):
+                                report_url_throttle(url, "страница с капчей")
+                            if response.status not in RETRY_STATUSES or attempt == retries:
+                                response.raise_for_status()
+                                if as_json:
+                                    return await response.json(content_type=None)
+                                return await response.text()
+                except aiohttp.ClientResponseError:
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        report_url_throttle(url, "таймаут запроса")
+                    if attempt == retries:
+                        raise
+                await asyncio.sleep(settings["backoff"] * (2 ** attempt))
+
+    # ---------- Браузер ----------
+
+    async def _ensure_browser(self):
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+        async with self._browser_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            # Перезапуск после max_pages страниц - только когда браузер никем не используется
+            if (self._browser is not None and self.max_pages and self.pages_served >= self.max_pages
+                    and self._open_contexts == 0):
+                logging.info(f"[AsyncStoreEngine] Перезапуск браузера после {self.pages_served} страниц")
+                await self._close_browser()
+            if self._browser is None:
+                self._browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+                self.pages_served = 0
+            self._open_contexts += 1
+            return self._browser
+
+    async def _install_blocking(self, context, store):
+        policy = self.block_policy
+        if not policy:
+            return
+        blocked = blocked_types(policy, store)
+        domains = policy["domains"]
+        if not blocked and not domains:
+            return
+        async def handle(route):
+            request = route.request
+            if is_blocked_request(blocked, domains, request.resource_type, request.url):
+                await route.abort()
+            else:
+                await route.continue_()
+        await context.route("**/*", handle)
+
+    # Контекст браузера на время одного вызова магазина (как BrowserSession.context)
+    @asynccontextmanager
+    async def _context(self, store, **kwargs):
+        browser = await self._ensure_browser()
+        try:
+            kwargs.setdefault("user_agent", DEFAULT_USER_AGENT)
+            context = await browser.new_context(**kwargs)
+            try:
+                await self._install_blocking(context, store)
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logging.warning(f"[AsyncStoreEngine] Ошибка закрытия контекста: {e}")
+        finally:
+            self._open_contexts -= 1
+
+    async def _new_page(self, context):
+        self.pages_served += 1
+        return await context.new_page()
+
+    # Открывает страницы по списку URL напрямую, не больше detail_pages вкладок одновременно.
+    # Результаты extract(page) - в порядке urls, для страниц с ошибкой - None.
+    # Объединение одновременных запросов страницы приложения (singleflight): вызовы с тем же
+    # ключом, пока первый выполняется, получают его результат. Задача защищена от отмены
+    # ожидающих (shield), чтобы отмена одного ключевого слова не сбрасывала запрос для других.
+    async def _single_flight(self, key, factory):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    # Открывает страницы по списку URL (не больше detail_pages вкладок одновременно);
+    # с store одновременные переходы на ту же страницу объединяются
+    async def _visit_pages(self, context, urls, extract, timeout=None, store=None):
+        semaphore = asyncio.Semaphore(self.detail_pages)
+        if timeout is None:
+            timeout = timeout_ms(store, "commit")
+        async def visit(url):
+            async with semaphore:
+                page = await self._new_page(context)
+                try:
+                    with measured(store, "commit"):
+                        await page.goto(url, wait_until="commit", timeout=timeout)
+                    return await extract(page)
+                except Exception as e:
+                    logging.error(f"[AsyncStoreEngine] Ошибка открытия {url}: {e}")
+                    return None
+                finally:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+        if store is not None:
+            return await asyncio.gather(*(self._single_flight(detail_key(store, url), lambda url=url: visit(url)) for url in urls))
+        return await asyncio.gather(*(visit(url) for url in urls))
+
+    # Ожидание готовности страницы (асинхронный вариант search._wait_ready)
+    async def _wait_ready(self, page, store, selector=None, load_state=None, network_idle=False, answered=None):
+        timeouts = _wait_timeouts(store)
+        started = time.time()
+        try:
+            with measured(store, "selector"):
+                if load_state:
+                    await page.wait_for_load_state(load_state, timeout=timeouts["selector"])
+                if selector:
+                    await page.wait_for_selector(selector, timeout=timeouts["selector"])
+            if network_idle:
+                try:
+                    with measured(store, "idle", censored=False):
+                        await page.wait_for_load_state("networkidle", timeout=timeouts["idle"])
+                except TimeoutError:
+                    pass
+        except TimeoutError:
+            if answered is not None and answered():
+                return
+            report_throttle(store, "страница с капчей" if is_captcha_url(page.url) else "таймаут ожидания страницы")
+            raise
+        finally:
+            record_wait(store, time.time() - started)
+
+    # Ожидание результатов страницы поиска (асинхронный вариант search._wait_results)
+    async def _wait_results(self, page, store, selector, captured=None, network_idle=False):
+        answered = (lambda: bool(captured)) if captured is not None else None
+        await self._wait_ready(page, store, selector=f"{selector}, {EMPTY_RESULTS_SELECTOR}", network_idle=network_idle, answered=answered)
+        return await page.locator(selector).count() > 0
+
+    @staticmethod
+    async def _read_json_responses(responses):
+        payloads = []
+        for response in responses:
+            try:
+                if "json" not in (response.headers.get("content-type") or ""):
+                    continue
+                payloads.append(await response.json())
+            except Exception as e:
+                logging.warning(f"[AsyncStoreEngine] Ошибка чтения ответа {response.url}: {e}")
+        return payloads
+
+    # Версии (url, версия) страниц приложений по ссылкам карточек: свежие - из кеша,
+    # остальные открываются напрямую. links - список (индекс карточки, ссылка).
+    async def _details_by_link(self, context, store, links, open_detail):
+        version_cache = get_version_cache()
+        details = {}
+        to_visit = []
+        for i, href in links:
+            cached = version_cache.lookup(store, href)
+            if cached:
+                details[i] = (cached["url"], cached["version"])
+            elif href:
+                to_visit.append((i, href))
+            else:
+                logging.info(f"[AsyncStoreEngine] {store}: карточка {i+1} без ссылки пропущена")
+        visited = await self._visit_pages(context, [href for _, href in to_visit], open_detail, store=store)
+        for (i, href), detail in zip(to_visit, visited):
+            if detail:
+                details[i] = detail
+                version_cache.put(store, detail[0], detail[1], aliases=(href,))
+        return details
+
+    # ---------- Магазины ----------
+
+    @async_store_search("Google Play")
+    async def search_google_play(self, keyword):
+        version_cache = get_version_cache()
+        results = await asyncio.to_thread(gp_search, keyword, lang="ru", country="ru")
+        async def with_version(app_data):
+            app_id = app_data.get("appId", "")
+            app_url = google_play_app_url(app_id)
+            version_value = app_data.get("version", "")
+            if version_value or not app_id:
+                return google_play_record(app_data, keyword, version_value)
+            # Кеш текущего цикла общий с потоковым движком: appId -> версия
+            cycle_version = version_cache.cycle_get("Google Play", app_id)
+            if cycle_version is not None:
+                return google_play_record(app_data, keyword, cycle_version)
+            version_value = version_cache.get("Google Play", app_url) or ""
+            if not version_value:
+                version_value = await self._single_flight(
+                    detail_key("Google Play", app_url), lambda: fetch_version(app_id, app_url)
+                )
+            version_cache.cycle_put("Google Play", app_id, version_value)
+            return google_play_record(app_data, keyword, version_value)
+        async def fetch_version(app_id, app_url):
+            version_value = ""
+            try:
+                async with self._host_semaphore(app_url):
+                    details = await asyncio.to_thread(gp_app, app_id, lang="ru", country="ru")
+                version_value = details.get("version", "")
+            except Exception as e:
+                logging.error(f"Ошибка получения версии через gp_app для {app_id}: {e}")
+            if not version_value:
+                try:
+                    html = await self._fetch(google_play_version_url(app_id))
+                    version_value = await asyncio.to_thread(parse_google_play_version, html)
+                except Exception as e:
+                    logging.error(f"Ошибка парсинга версии для Google Play ({app_id}): {e}")
+            version_cache.put("Google Play", app_url, version_value)
+            return version_value
+        return list(await asyncio.gather(*(with_version(app_data) for app_data in results[:self.limits["Google Play"]])))
+
+    @async_store_search("App Store")
+    async def search_app_store(self, keyword):
+        params = {"term": keyword, "country": "US", "media": "software", "limit": self.limits["App Store"]}
+        data = await self._fetch(APP_STORE_SEARCH_URL, params=params, as_json=True)
+        return parse_app_store_results(data, keyword)
+
+    @async_store_search("RuStore")
+    async def search_rustore(self, keyword):
+        version_cache = get_version_cache()
+        html = await self._fetch(rustore_search_url(keyword))
+        # Разбор BeautifulSoup занимает процессор - выполняем вне цикла событий
+        apps = await asyncio.to_thread(parse_rustore_search, html, keyword, self.limits["RuStore"])
+        async def fetch_version(url):
+            try:
+                page_html = await self._fetch(url)
+                return await asyncio.to_thread(parse_rustore_version, page_html)
+            except Exception as e:
+                logging.error(f"Ошибка получения версии для RuStore ({url}): {e}")
+                return ""
+        async def fill_version(app):
+            app["version"] = await self._single_flight(detail_key("RuStore", app["url"]), lambda: fetch_version(app["url"]))
+            version_cache.put("RuStore", app["url"], app["version"])
+        missing = []
+        for app in apps:
+            if not app["url"]:
+                continue
+            cached = version_cache.get("RuStore", app["url"])
+            if cached is not None:
+                app["version"] = cached
+            else:
+                missing.append(app)
+        await asyncio.gather(*(fill_version(app) for app in missing))
+        return apps
+
+    @async_store_search("Xiaomi Global Store")
+    async def search_xiaomi_global(self, keyword):
+        store = "Xiaomi Global Store"
+        async def open_detail(page):
+            await self._wait_ready(page, store, load_state="load")
+            locator = page.locator(XIAOMI_GLOBAL_VERSION_SELECTOR)
+            version = ""
+            if await locator.count() > 0:
+                version = _xiaomi_global_version(await locator.first.get_attribute("aria-label"))
+            return page.url, version
+        async with self._context(store, locale="ru-RU") as context:
+            page = await self._new_page(context)
+            with measured(store, "goto"):
+                await page.goto(xiaomi_global_search_url(keyword), timeout=timeout_ms(store, "goto"))
+            if not await self._wait_results(page, store, "div.container_oG9MN"):
+                return []
+            records = await page.eval_on_selector_all("div.container_oG9MN", _XIAOMI_GLOBAL_CARDS_JS)
+            selected = _select_xiaomi_global_cards(records, self.limits[store])
+            known_details = _known_cards(self.known, store, selected)
+            details = await self._details_by_link(context, store, [(i, href) for i, _, _, href in selected if i not in known_details], open_detail)
+            details.update((i, (detail["url"], detail["version"])) for i, detail in known_details.items())
+        results = []
+        for i, name, developer, href in selected:
+            if i not in details:
+                continue
+            detail_url, version = details[i]
+            results.append({
+                "platform": store,
+                "keyword": keyword,
+                "title": name,
+                "developer": developer,
+                "url": detail_url,
+                "version": version
+            })
+        return results
+
+    @async_store_search("Xiaomi GetApps")
+    async def search_xiaomi_getapps(self, keyword):
+        store = "Xiaomi GetApps"
+        async def open_detail(page):
+            app_url = page.url
+            description = ""
+            try:
+                await self._wait_ready(page, store, selector="p.app-info__brief_Ewrks")
+                desc_locator = page.locator("p.app-info__brief_Ewrks")
+                if await desc_locator.count() > 0:
+                    description = (await desc_locator.first.inner_text()).strip()
+            except Exception as e:
+                logging.warning(f"Не найден селектор описания для '{app_url}': {e}")
+            version = ""
+            try:
+                version = _xiaomi_getapps_version(await page.locator("div.app-more__item__content_YMXlz").all_inner_texts())
+            except Exception as e:
+                logging.warning(f"Ошибка извлечения версии для '{app_url}': {e}")
+            return app_url, description, version
+        async with self._context(store, locale="ru-RU") as context:
+            page = await self._new_page(context)
+            with measured(store, "goto"):
+                await page.goto(xiaomi_getapps_search_url(keyword), timeout=timeout_ms(store, "goto"))
+            if not await self._wait_results(page, store, "div.search-result__item__container_KFv1n"):
+                return []
+            records = await page.eval_on_selector_all("div.search-result__item__container_KFv1n", _XIAOMI_GETAPPS_CARDS_JS)
+            selected = _select_xiaomi_getapps_cards(records, self.limits[store])
+            known_details = _known_cards(self.known, store, selected)
+            details = {i: (detail["url"], "", detail["version"]) for i, detail in known_details.items()}
+            fresh = set(details)
+            links = []
+            for i, _, _, href in selected:
+                if not href or i in details:
+                    continue
+                cached = get_version_cache().lookup(store, href)
+                if cached:
+                    details[i] = (cached["url"], "", cached["version"])
+                    fresh.add(i)
+                else:
+                    links.append((i, href))
+            visited = await self._visit_pages(context, [href for _, href in links], open_detail, store=store)
+        details.update((i, detail) for (i, _), detail in zip(links, visited) if detail)
+        results = []
+        for i, title, developer, href in selected:
+            if i not in details:
+                continue
+            app_url, description, version = details[i]
+            if i not in fresh:
+                get_version_cache().put(store, app_url, version, aliases=(href,))
+            results.append({
+                "platform": store,
+                "keyword": keyword,
+                "title": title,
+                "developer": developer,
+                "version": version,
+                "description": description,
+                "url": app_url
+            })
+        return results
+
+    @async_store_search("Samsung Galaxy Store")
+    async def search_galaxy_store(self, keyword):
+        store = "Samsung Galaxy Store"
+        num_results = self.limits[store]
+        version_cache = get_version_cache()
+        async def open_detail(page):
+            await self._wait_ready(page, store, load_state="load", network_idle=True)
+            try:
+                return page.url, _galaxy_version_from_text(await page.inner_text("body"))
+            except Exception as e:
+                logging.error(f"[extract_version] Ошибка при поиске версии: {e}")
+                return page.url, ""
+        async with self._context(store) as context:
+            page = await self._new_page(context)
+            captured = _capture_responses(page, GALAXY_API_PATTERN)
+            with measured(store, "goto"):
+                await page.goto(galaxy_search_url(keyword), timeout=timeout_ms(store, "goto"))
+            has_cards = await self._wait_results(page, store, "li.MuiGridListTile-root", captured, network_idle=True)
+            # Основной путь: записи из JSON, который страница загрузила сама
+            apps = _galaxy_apps_from_json(await self._read_json_responses(captured), keyword, num_results)
+            if apps:
+                missing = []
+                for app in apps:
+                    if not app["version"]:
+                        cached = version_cache.get(store, app["url"])
+                        if cached is not None:
+                            app["version"] = cached
+                        else:
+                            missing.append(app)
+                known_details = _known_cards(self.known, store, [(n, app["title"], app["developer"], app["url"]) for n, app in enumerate(missing)])
+                for n, detail in known_details.items():
+                    missing[n]["url"], missing[n]["version"] = detail["url"], detail["version"]
+                missing = [app for n, app in enumerate(missing) if n not in known_details]
+                visited = await self._visit_pages(context, [app["url"] for app in missing], open_detail, store=store)
+                for app, detail in zip(missing, visited):
+                    if detail:
+                        version_cache.put(store, detail[0], detail[1], aliases=(app["url"],))
+                        app["url"], app["version"] = detail[0], detail[1]
+                return apps
+            if not has_cards:
+                return apps
+            # Запасной путь: разбор карточек на странице
+            records = await page.eval_on_selector_all("li.MuiGridListTile-root", _GALAXY_CARDS_JS)
+            selected = _select_galaxy_cards(records, num_results)
+            cards = [(i, records[i]["title"], records[i]["developer"], records[i]["href"]) for i in selected]
+            known_details = _known_cards(self.known, store, cards)
+            details = await self._details_by_link(context, store, [(i, records[i]["href"]) for i in selected if i not in known_details], open_detail)
+            details.update((i, (detail["url"], detail["version"])) for i, detail in known_details.items())
+        for i in selected:
+            detail_url, version_info = details.get(i, ("", ""))
+            if not detail_url:
+                continue
+            apps.append({
+                "platform": store,
+                "keyword": keyword,
+                "title": records[i]["title"],
+                "developer": records[i]["developer"],
+                "price": records[i]["price"],
+                "url": detail_url,
+                "version": version_info,
+            })
+        return apps
+
+    @async_store_search("Huawei AppGallery")
+    async def search_huawei_appgallery(self, keyword):
+        store = "Huawei AppGallery"
+        async def extract_details(page):
+            try:
+                await self._wait_ready(page, store, selector="div.appSingleInfo")
+                version_locator = page.locator(HUAWEI_VERSION_XPATH)
+                developer_locator = page.locator(HUAWEI_DEVELOPER_XPATH)
+                version = (await version_locator.first.inner_text()).strip() if await version_locator.count() > 0 else ""
+                developer = (await developer_locator.first.inner_text()).strip() if await developer_locator.count() > 0 else ""
+                return version, developer
+            except Exception as e:
+                logging.error(f"[extract_app_details] Ошибка при извлечении деталей: {e}")
+                return "", ""
+        async def open_detail(page):
+            version, developer = await extract_details(page)
+            return page.url, version, developer
+        # Карточки без ссылки открываются кликом по заголовку на странице поиска (по одной)
+        async def click_detail(page, card_index):
+            try:
+                with measured(store, "element"):
+                    element = await page.locator("p[data-v-302a9de2]").nth(card_index * 2).element_handle(timeout=timeout_ms(store, "element"))
+                if not element:
+                    return "", "", ""
+                with measured(store, "navigation"):
+                    async with page.expect_navigation(timeout=timeout_ms(store, "navigation")):
+                        await element.evaluate("el => el.click()")
+                detail_url = page.url
+                version, developer = await extract_details(page)
+                with measured(store, "navigation"):
+                    await page.go_back(timeout=timeout_ms(store, "navigation"))
+                await self._wait_ready(page, store, selector="p[data-v-302a9de2]", network_idle=True)
+                return detail_url, version, developer
+            except Exception as e:
+                logging.error(f"[click_title_get_detail_info] Ошибка при переходе: {e}")
+                return "", "", ""
+        version_cache = get_version_cache()
+        async with self._context(store) as context:
+            page = await self._new_page(context)
+            captured = _capture_responses(page, HUAWEI_API_PATTERN)
+            with measured(store, "goto"):
+                await page.goto(huawei_search_url(keyword), timeout=timeout_ms(store, "goto"))
+            try:
+                has_cards = await self._wait_results(page, store, "p[data-v-302a9de2]", captured, network_idle=True)
+            except TimeoutError:
+                # Нет ни карточек, ни пустой выдачи, ни ответа API - ошибка магазина для предохранителя
+                logging.error("[search_huawei_appgallery] Не удалось загрузить результаты поиска.")
+                raise
+            apps = _huawei_apps_from_json(await self._read_json_responses(captured), keyword, self.limits[store])
+            if apps:
+                missing = [app for app in apps if not app["version"] or not app["developer"]]
+                known_urls = set()
+                for n, detail in _known_cards(self.known, store, [(n, app["title"], app["developer"], app["url"]) for n, app in enumerate(missing)]).items():
+                    if missing[n]["developer"] or detail["developer"]:
+                        missing[n]["version"] = missing[n]["version"] or detail["version"]
+                        missing[n]["developer"] = missing[n]["developer"] or detail["developer"]
+                        known_urls.add(missing[n]["url"])
+                missing = [app for app in missing if app["url"] not in known_urls]
+                visited = await self._visit_pages(context, [app["url"] for app in missing], open_detail, store=store)
+                for app, detail in zip(missing, visited):
+                    if detail:
+                        app["url"] = detail[0]
+                        app["version"] = app["version"] or detail[1]
+                        app["developer"] = app["developer"] or detail[2]
+                for app in apps:
+                    if app["url"] not in known_urls:
+                        version_cache.put(store, app["url"], app["version"])
+                return apps
+            if not has_cards:
+                return apps
+            items = await page.eval_on_selector_all("p[data-v-302a9de2]", _HUAWEI_TEXTS_JS)
+            selected = _select_huawei_cards(items, self.limits[store])
+            known_details = _known_cards(self.known, store, [(i, title, "", href) for i, title, _, href in selected])
+            links = [(i, href) for i, _, _, href in selected if href and i not in known_details]
+            visited = await self._visit_pages(context, [href for _, href in links], open_detail, store=store)
+            details = {i: detail for (i, _), detail in zip(links, visited) if detail}
+            details.update((i, (detail["url"], detail["version"], detail["developer"])) for i, detail in known_details.items())
+            for i, title, description, href in selected:
+                if not href and i not in details:
+                    details[i] = await click_detail(page, i)
+        for i, title, description, href in selected:
+            detail_url, version, developer = details.get(i, ("", "", ""))
+            if not detail_url:
+                continue
+            if i not in known_details:
+                version_cache.put(store, detail_url, version, aliases=(href,))
+            apps.append({
+                "platform": store,
+                "keyword": keyword,
+                "title": title,
+                "description": description,
+                "url": detail_url,
+                "version": version,
+                "developer": developer,
+            })
+        return apps
+
+    # ---------- Планирование ----------
+
+    def _store_semaphore(self, store):
+        semaphore = self._store_semaphores.get(store)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.store_concurrency[store])
+            self._store_semaphores[store] = semaphore
+        return semaphore
+
+    # Вызов магазина под его семафором с ограничением частоты (rate_limiter);
+    # ошибка магазина не прерывает остальные магазины ключевого слова.
+    # Магазин, отключенный предохранителем (circuit_breaker), пропускается сразу.
+    async def _call_store(self, store, keyword):
+        breaker = get_breaker(store.name)
+        if not breaker.allow():
+            return []
+        async with self._store_semaphore(store.name):
+            limiter = get_limiter(store.name)
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.stop_event.is_set():
+                breaker.cancel_probe()
+                return []
+            try:
+                apps = [normalize_record(app) for app in await store.async_search(self, keyword)]
+            except asyncio.CancelledError:
+                breaker.cancel_probe()
+                raise
+            except Exception as e:
+                logging.error(f"❌ {store.name} ошибка для '{keyword}': {e}")
+                breaker.failure(e)
+                return []
+            breaker.success()
+            limiter.success()
+            return apps
+
+    # Поиск по всем включенным магазинам для одного ключевого слова (результаты - в порядке реестра)
+    async def search_keyword(self, keyword):
+        results = await asyncio.gather(*(self._call_store(store, keyword) for store in enabled_stores(self.config)))
+        return [app for store_results in results for app in store_results]
+
+    # Отменяет незавершенные задачи при установке stop_event
+    async def _watch_stop(self, tasks):
+        while not all(task.done() for task in tasks):
+            if self.stop_event.is_set():
+                for task in tasks:
+                    task.cancel()
+                return
+            await asyncio.sleep(0.5)
+
+    # Поиск по списку ключевых слов: не больше keyword_concurrency слов одновременно.
+    # Возвращает словарь {ключевое слово: результаты}; прерванные остановкой слова отсутствуют.
+    async def search_keywords(self, keywords):
+        semaphore = asyncio.Semaphore(self.keyword_concurrency)
+        async def run_keyword(keyword):
+            async with semaphore:
+                return keyword, await self.search_keyword(keyword)
+        tasks = [asyncio.ensure_future(run_keyword(keyword)) for keyword in dict.fromkeys(keywords)]
+        watcher = asyncio.ensure_future(self._watch_stop(tasks))
+        try:
+            done = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            watcher.cancel()
+        results = {}
+        for item in done:
+            if isinstance(item, BaseException):
+                if not isinstance(item, asyncio.CancelledError):
+                    logging.error(f"[AsyncStoreEngine] Ошибка обработки ключевого слова: {item}")
+                continue
+            results[item[0]] = item[1]
+        return results
+
+    async def _close_browser(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logging.warning(f"[AsyncStoreEngine] Ошибка закрытия браузера: {e}")
+            self._browser = None
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+        await self._close_browser()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logging.warning(f"[AsyncStoreEngine] Ошибка остановки Playwright: {e}")
+            self._playwright = None
+
+# Класс-обертка для ParserThread: владеет циклом событий движка и дает синхронный интерфейс
+class AsyncEngineRunner:
+    def __init__(self, config, limits, stop_event=None, known=None):
+        self._loop = asyncio.new_event_loop()
+        self.engine = AsyncStoreEngine(config, limits, stop_event, known)
+
+    def search_keywords(self, keywords):
+        return self._loop.run_until_complete(self.engine.search_keywords(keywords))
+
+    def close(self):
+        try:
+            self._loop.run_until_complete(self.engine.close())
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+        finally:
+            self._loop.close()
@@ -0,0 +1,285 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlsplit, parse_qs
+
+from fixtures import FixtureStore, ReplayServer, recording, FIXTURES_DIR
+from browser_pool import BrowserPool, resource_block_policy, har_path
+from version_cache import get_version_cache
+from stores import STORES
+from search import (
+    parse_rustore_search, parse_rustore_version, parse_google_play_version, parse_app_store_results,
+    _parse_rustore_search_full, _parse_rustore_version_full, _parse_google_play_version_full,
+    get_google_play_version, _galaxy_apps_from_json, _huawei_apps_from_json,
+    GALAXY_API_PATTERN, HUAWEI_API_PATTERN
+)
+
+# Стенд для записи фикстур магазинов и измерения скорости разбора без обращения к живым магазинам:
+#   python bench.py record telegram vk [--browser]  - записать ответы магазинов
+#   python bench.py parse [--repeat 20]             - время, память и записей/с по парсерам
+#   python bench.py parse --check                   - сверить результаты с эталоном и быстрые пути с полными
+#   python bench.py replay [--browser]              - адаптеры магазинов целиком на локальном сервере
+# Совпадение быстрых путей с полным разбором на страницах из репозитория проверяют тесты:
+#   python -m pytest tests
+
+SNAPSHOT_FILE = "expected.json"
+# Границы групп фикстур по размеру ответа (байты)
+SIZE_BUCKETS = [(50 * 1024, "<50K"), (500 * 1024, "50K-500K"), (None, ">500K")]
+
+def _query_param(key, name):
+    return parse_qs(urlsplit("//" + key).query).get(name, [""])[0]
+
+# Парсеры HTTP-фикстур: (название, признак URL, функция разбора текста ответа)
+HTTP_PARSERS = [
+    ("RuStore: поиск", "apps.rustore.ru/search",
+     lambda text, key: parse_rustore_search(text, _query_param(key, "query"), 20)),
+    ("RuStore: поиск (полный разбор)", "apps.rustore.ru/search",
+     lambda text, key: _parse_rustore_search_full(text, _query_param(key, "query"), 20)),
+    ("RuStore: версия", "apps.rustore.ru/catalog/app",
+     lambda text, key: parse_rustore_version(text)),
+    ("RuStore: версия (полный разбор)", "apps.rustore.ru/catalog/app",
+     lambda text, key: _parse_rustore_version_full(text)),
+    ("Google Play: версия", "play.google.com/store/apps/details",
+     lambda text, key: parse_google_play_version(text)),
+    ("Google Play: версия (полный разбор)", "play.google.com/store/apps/details",
+     lambda text, key: _parse_google_play_version_full(text)),
+    ("App Store: поиск", "itunes.apple.com/search",
+     lambda text, key: parse_app_store_results(json.loads(text), _query_param(key, "term"))),
+]
+# Пары (быстрый путь, полный разбор), результаты которых на одной фикстуре должны совпадать
+PARSER_PAIRS = [
+    ("RuStore: поиск", "RuStore: поиск (полный разбор)"),
+    ("RuStore: версия", "RuStore: версия (полный разбор)"),
+    ("Google Play: версия", "Google Play: версия (полный разбор)"),
+]
+# Парсеры перехваченных JSON-ответов браузерных магазинов (из HAR)
+HAR_PARSERS = [
+    ("Galaxy Store: JSON", "Samsung Galaxy Store", GALAXY_API_PATTERN,
+     lambda payloads: _galaxy_apps_from_json(payloads, "", 1000)),
+    ("Huawei AppGallery: JSON", "Huawei AppGallery", HUAWEI_API_PATTERN,
+     lambda payloads: _huawei_apps_from_json(payloads, "", 1000)),
+]
+
+def _size_bucket(size):
+    for limit, name in SIZE_BUCKETS:
+        if limit is None or size < limit:
+            return name
+
+# Функция читает из HAR тела JSON-ответов с URL по шаблону
+def _har_payloads(path, pattern):
+    with open(path, "r", encoding="utf-8") as f:
+        har = json.load(f)
+    payloads = []
+    size = 0
+    for entry in har.get("log", {}).get("entries", []):
+        content = entry.get("response", {}).get("content", {})
+        if not pattern.search(entry.get("request", {}).get("url", "")) or "json" not in content.get("mimeType", ""):
+            continue
+        text = content.get("text", "")
+        if content.get("encoding") == "base64":
+            text = base64.b64decode(text).decode("utf-8", errors="replace")
+        try:
+            payloads.append(json.loads(text))
+            size += len(text)
+        except ValueError:
+            continue
+    return payloads, size
+
+# Функция перечисляет случаи разбора: (парсер, ключ фикстуры, размер, функция без аргументов)
+def parse_cases(fixtures):
+    cases = []
+    for key, entry in sorted(fixtures.entries.items()):
+        for name, marker, func in HTTP_PARSERS:
+            if marker in key and entry["status"] == 200:
+                text = fixtures.read_text(entry)
+                cases.append((name, key, entry["size"], lambda func=func, text=text, key=key: func(text, key)))
+    for name, store, pattern, func in HAR_PARSERS:
+        for keyword in fixtures.keywords:
+            har = har_path(fixtures.har_dir, store, keyword)
+            if not os.path.exists(har):
+                continue
+            payloads, size = _har_payloads(har, pattern)
+            if payloads:
+                cases.append((name, os.path.basename(har), size, lambda func=func, payloads=payloads: func(payloads)))
+    return cases
+
+# Приводит результат парсера к JSON-совместимому виду для сравнения с эталоном
+def _jsonable(result):
+    return json.loads(json.dumps(result, ensure_ascii=False, default=lambda o: o.to_dict()))
+
+def _records(result):
+    return len(result) if isinstance(result, list) else (1 if result else 0)
+
+def bench_parse(fixtures, repeat):
+    rows = {}
+    for name, key, size, run in parse_cases(fixtures):
+        tracemalloc.start()
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        elapsed = (time.perf_counter() - started) / repeat
+        row = rows.setdefault((name, _size_bucket(size)), {"count": 0, "seconds": 0.0, "peak": 0, "records": 0})
+        row["count"] += 1
+        row["seconds"] += elapsed
+        row["peak"] = max(row["peak"], peak)
+        row["records"] += _records(result)
+    if not rows:
+        print(f"Фикстуры не найдены в {fixtures.root}. Сначала: python bench.py record <ключевое слово>")
+        return
+    print(f"{'Парсер':<38}{'Размер':<10}{'Фикстур':>8}{'мс/разбор':>11}{'Пик, КиБ':>10}{'Записей/с':>11}")
+    for (name, bucket), row in sorted(rows.items()):
+        per_parse = row["seconds"] / row["count"]
+        rate = row["records"] / row["seconds"] if row["seconds"] else 0
+        print(f"{name:<38}{bucket:<10}{row['count']:>8}{per_parse * 1000:>11.2f}{row['peak'] / 1024:>10.0f}{rate:>11.0f}")
+
+# Сохраняет результаты парсеров как эталон для --check
+def snapshot(fixtures):
+    expected = {f"{name}|{key}": _jsonable(run()) for name, key, size, run in parse_cases(fixtures)}
+    with open(os.path.join(fixtures.root, SNAPSHOT_FILE), "w", encoding="utf-8") as f:
+        json.dump(expected, f, ensure_ascii=False, indent=2)
+    print(f"Эталон сохранен: {len(expected)} результатов")
+
+# Сверяет результаты парсеров с эталоном и быстрые пути с полным разбором;
+# возвращает число расхождений (отсутствие эталона тоже считается ошибкой)
+def check(fixtures):
+    path = os.path.join(fixtures.root, SNAPSHOT_FILE)
+    expected = {}
+    failures = 0
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    else:
+        print(f"Нет эталона {path}. Сначала: python bench.py snapshot")
+        failures += 1
+    results = {}
+    for name, key, size, run in parse_cases(fixtures):
+        case = f"{name}|{key}"
+        results[(name, key)] = _jsonable(run())
+        if case in expected and results[(name, key)] != expected[case]:
+            failures += 1
+            print(f"РАСХОЖДЕНИЕ: {case}")
+    print(f"Проверено: {len(expected)}, расхождений: {failures}")
+    return failures + check_paths(results)
+
+# Сверяет быстрый путь разбора с полным на каждой фикстуре; возвращает число расхождений
+def check_paths(results):
+    compared = 0
+    failures = 0
+    for fast, full in PARSER_PAIRS:
+        for (name, key), result in results.items():
+            if name != fast or (full, key) not in results:
+                continue
+            compared += 1
+            if result != results[(full, key)]:
+                failures += 1
+                print(f"РАСХОЖДЕНИЕ ПУТЕЙ: {fast} | {key}")
+    print(f"Сверено быстрых путей: {compared}, расхождений: {failures}")
+    return failures
+
+def _gp_app_id(url):
+    return parse_qs(urlsplit(url).query).get("id", [""])[0]
+
+# Записывает ответы магазинов по ключевым словам. google_play_scraper обращается к сети
+# мимо http_client, поэтому для Google Play записываются только страницы приложений.
+def record(fixtures, keywords, browser):
+    get_version_cache().default_ttl = 0
+    with recording(fixtures):
+        for keyword in keywords:
+            for store in STORES:
+                if store.kind != "http":
+                    continue
+                apps = store.run(keyword, store.default_limit)
+                print(f"[{keyword}] {store.name}: {len(apps)}")
+                if store.name == "Google Play":
+                    for app in apps:
+                        get_google_play_version(_gp_app_id(app.url))
+    if browser:
+        os.makedirs(fixtures.har_dir, exist_ok=True)
+        # HAR пишется при закрытии контекста, поэтому у каждого ключевого слова свой пул и свой файл
+        for keyword in keywords:
+            pool = BrowserPool(har_dir=fixtures.har_dir, har_mode="record", har_keyword=keyword,
+                               block_policy=resource_block_policy({}))
+            try:
+                for store in STORES:
+                    if store.kind == "browser":
+                        apps = store.run(keyword, store.default_limit, pool=pool)
+                        print(f"[{keyword}] {store.name}: {len(apps)}")
+            finally:
+                pool.close()
+    fixtures.keywords = list(dict.fromkeys(fixtures.keywords + keywords))
+    fixtures.save()
+    snapshot(fixtures)
+
+# Прогоняет адаптеры магазинов целиком на записанных ответах: HTTP - через локальный сервер,
+# браузерные - из HAR, записанного для каждого ключевого слова
+def bench_replay(fixtures, repeat, browser):
+    get_version_cache().default_ttl = 0
+    keywords = fixtures.keywords
+    if not keywords:
+        print(f"Фикстуры не найдены в {fixtures.root}")
+        return
+    print(f"{'Адаптер':<24}{'Ключевое слово':<20}{'с/прогон':>10}{'Записей':>9}")
+    with ReplayServer(fixtures) as server:
+        for store in STORES:
+            if store.kind != "http" or store.name == "Google Play":
+                continue
+            for keyword in keywords:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    apps = store.run(keyword, store.default_limit)
+                elapsed = (time.perf_counter() - started) / repeat
+                print(f"{store.name:<24}{keyword:<20}{elapsed:>10.3f}{len(apps):>9}")
+        if server.misses:
+            print(f"Запросов без фикстуры: {len(server.misses)}")
+    if browser:
+        for keyword in keywords:
+            pool = BrowserPool(har_dir=fixtures.har_dir, har_mode="replay", har_keyword=keyword)
+            try:
+                for store in STORES:
+                    if store.kind != "browser":
+                        continue
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        apps = store.run(keyword, store.default_limit, pool=pool)
+                    elapsed = (time.perf_counter() - started) / repeat
+                    print(f"{store.name:<24}{keyword:<20}{elapsed:>10.3f}{len(apps):>9}")
+            finally:
+                pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Фикстуры и замеры парсеров магазинов")
+    parser.add_argument("--dir", default=FIXTURES_DIR, help="каталог фикстур")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="записать ответы магазинов")
+    record_parser.add_argument("keywords", nargs="+")
+    record_parser.add_argument("--browser", action="store_true", help="записать HAR браузерных магазинов")
+    parse_parser = commands.add_parser("parse", help="замер парсеров на фикстурах")
+    parse_parser.add_argument("--repeat", type=int, default=20)
+    parse_parser.add_argument("--check", action="store_true", help="сверить результаты с эталоном")
+    commands.add_parser("snapshot", help="сохранить текущие результаты парсеров как эталон")
+    replay_parser = commands.add_parser("replay", help="адаптеры целиком на записанных ответах")
+    replay_parser.add_argument("--repeat", type=int, default=3)
+    replay_parser.add_argument("--browser", action="store_true")
+    args = parser.parse_args()
+
+    fixtures = FixtureStore(args.dir)
+    if args.command == "record":
+        record(fixtures, args.keywords, args.browser)
+    elif args.command == "parse":
+        if args.check:
+            sys.exit(1 if check(fixtures) else 0)
+        bench_parse(fixtures, max(1, args.repeat))
+    elif args.command == "snapshot":
+        snapshot(fixtures)
+    elif args.command == "replay":
+        bench_replay(fixtures, max(1, args.repeat), args.browser)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import logging
+import os
+import queue
+import re
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from playwright.sync_api import sync_playwright
+
+from timeouts import measured, timeout_ms
+from version_cache import get_detail_flights, detail_key
+
+# Параметры запуска Chromium, общие для всех браузерных магазинов
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+BROWSER_ARGS = ["--disable-gpu", "--no-sandbox"]
+
+# Типы ресурсов и домены счетчиков/аналитики, которые по умолчанию не загружаются
+DEFAULT_BLOCKED_RESOURCES = ["image", "font", "media"]
+DEFAULT_BLOCKED_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "mc.yandex.ru",
+    "facebook.net",
+    "hm.baidu.com",
+    "scorecardresearch.com"
+]
+
+# Функция собирает политику блокировки ресурсов из конфигурации.
+# browser_allow_resources - разрешенные типы ресурсов для отдельных магазинов,
+# когда селектору действительно нужен отрисованный элемент (например, иконка).
+def resource_block_policy(config):
+    if not config.get("browser_block_enabled", True):
+        return None
+    return {
+        "resources": set(config.get("browser_block_resources", DEFAULT_BLOCKED_RESOURCES)),
+        "domains": tuple(config.get("browser_block_domains", DEFAULT_BLOCKED_DOMAINS)),
+        "allow": {store: set(types) for store, types in config.get("browser_allow_resources", {}).items()}
+    }
+
+# Типы ресурсов, блокируемые для магазина (с учетом его разрешений)
+def blocked_types(policy, store):
+    return policy["resources"] - policy["allow"].get(store, set())
+
+# Функция проверяет, нужно ли отклонить запрос браузера: тип ресурса или домен счетчика
+def is_blocked_request(blocked, domains, resource_type, url):
+    host = urlsplit(url).netloc
+    return resource_type in blocked or any(host == d or host.endswith("." + d) for d in domains)
+
+# Путь к HAR-файлу магазина и ключевого слова в каталоге фикстур
+def har_path(har_dir, store, keyword=None):
+    name = re.sub(r"[^\w.-]+", "_", store or "browser")
+    if keyword:
+        name += "__" + re.sub(r"[^\w.-]+", "_", keyword)
+    return os.path.join(har_dir, name + ".har")
+
+# Класс браузерной сессии: один Playwright и один Chromium, привязанные к потоку.
+# Sync API Playwright нельзя использовать из другого потока, поэтому сессия
+# создается и используется строго внутри потока, который ее открыл.
+class BrowserSession:
+    def __init__(self, max_pages=200, detail_pages=4, block_policy=None, har_dir=None, har_mode=None,
+                 har_keyword=None):
+        self.max_pages = max_pages
+        self.detail_pages = detail_pages
+        self.block_policy = block_policy
+        # Фикстуры: "record" пишет HAR по магазину и ключевому слову в har_dir, "replay" отвечает из него
+        self.har_dir = har_dir
+        self.har_mode = har_mode
+        self.har_keyword = har_keyword
+        self.pages_served = 0
+        self._playwright = None
+        self._browser = None
+
+    # Запускает браузер при первом обращении и перезапускает его,
+    # когда он отдал max_pages страниц (ограничение роста памяти Chromium)
+    def _ensure_browser(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        if self._browser is not None and self.max_pages and self.pages_served >= self.max_pages:
+            logging.info(f"[BrowserSession] Перезапуск браузера после {self.pages_served} страниц")
+            self._close_browser()
+        if self._browser is None:
+            self._browser = self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            self.pages_served = 0
+        return self._browser
+
+    # Подключает к контексту блокировку ресурсов по политике с учетом разрешений магазина
+    def _install_blocking(self, context, store):
+        policy = self.block_policy
+        if not policy:
+            return
+        blocked = blocked_types(policy, store)
+        domains = policy["domains"]
+        if not blocked and not domains:
+            return
+        def handle(route):
+            request = route.request
+            if is_blocked_request(blocked, domains, request.resource_type, request.url):
+                route.abort()
+            else:
+                route.continue_()
+        context.route("**/*", handle)
+
+    def har_path(self, store):
+        return har_path(self.har_dir, store, self.har_keyword)
+
+    # Контекст браузера (cookies, кеш) на время одного вызова магазина
+    @contextmanager
+    def context(self, store=None, **kwargs):
+        browser = self._ensure_browser()
+        kwargs.setdefault("user_agent", DEFAULT_USER_AGENT)
+        if self.har_mode == "record":
+            kwargs["record_har_path"] = self.har_path(store)
+        context = browser.new_context(**kwargs)
+        if self.har_mode == "replay":
+            # Запросы, которых нет в HAR, отклоняются - блокировка не нужна
+            context.route_from_har(self.har_path(store), not_found="abort")
+        else:
+            self._install_blocking(context, store)
+        try:
+            yield context
+        finally:
+            try:
+                context.close()
+            except Exception as e:
+                logging.warning(f"[BrowserSession] Ошибка закрытия контекста: {e}")
+
+    # Новая страница в контексте с учетом счетчика для перезапуска браузера
+    def new_page(self, context):
+        self.pages_served += 1
+        return context.new_page()
+
+    # Открывает страницы по списку URL напрямую, по detail_pages вкладок одного контекста.
+    # Навигация запускается сразу во всех вкладках партии (ожидание только начала ответа),
+    # затем для каждой вкладки вызывается extract(page). Результаты - в порядке urls,
+    # для страниц с ошибкой - None. Без timeout действует адаптивный таймаут магазина platform.
+    # С platform одновременные переходы на ту же страницу объединяются между сессиями:
+    # сессия открывает только страницы, которые еще никто не открывает, и лишь после
+    # публикации своих результатов ждет чужие (поэтому сессии не ждут друг друга по кругу).
+    def visit_pages(self, context, urls, extract, concurrency=None, timeout=None, platform=None):
+        if timeout is None:
+            timeout = timeout_ms(platform, "commit")
+        if platform is None:
+            return self._visit_pages(context, urls, extract, concurrency, timeout)
+        flights = get_detail_flights()
+        results = [None] * len(urls)
+        leading = []
+        waiting = []
+        for index, url in enumerate(urls):
+            key = detail_key(platform, url)
+            call, leader = flights.begin(key)
+            (leading if leader else waiting).append((index, key, call))
+        visited = [None] * len(leading)
+        try:
+            visited = self._visit_pages(context, [urls[index] for index, _, _ in leading], extract, concurrency, timeout, platform)
+        finally:
+            for (index, key, call), detail in zip(leading, visited):
+                results[index] = detail
+                flights.finish(key, call, detail)
+        for index, key, call in waiting:
+            results[index] = flights.wait(call)
+        return results
+
+    def _visit_pages(self, context, urls, extract, concurrency, timeout, platform=None):
+        results = [None] * len(urls)
+        if not urls:
+            return results
+        concurrency = max(1, min(concurrency or self.detail_pages, len(urls)))
+        # Вкладки переиспользуются между партиями, поэтому счетчик перезапуска браузера
+        # увеличивается на каждый переход, а не при создании вкладки
+        pages = [context.new_page() for _ in range(concurrency)]
+        try:
+            for start in range(0, len(urls), concurrency):
+                batch = list(enumerate(urls[start:start + concurrency], start))
+                started = []
+                for page, (index, url) in zip(pages, batch):
+                    try:
+                        with measured(platform, "commit"):
+                            page.goto(url, wait_until="commit", timeout=timeout)
+                        self.pages_served += 1
+                        started.append((page, index, url))
+                    except Exception as e:
+                        logging.error(f"[BrowserSession] Ошибка открытия {url}: {e}")
+                for page, index, url in started:
+                    try:
+                        results[index] = extract(page)
+                    except Exception as e:
+                        logging.error(f"[BrowserSession] Ошибка обработки {url}: {e}")
+        finally:
+            for page in pages:
+                try:
+                    page.close()
+                except Exception:
+                    pass
+        return results
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logging.warning(f"[BrowserSession] Ошибка закрытия браузера: {e}")
+            self._browser = None
+
+    def close(self):
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logging.warning(f"[BrowserSession] Ошибка остановки Playwright: {e}")
+            self._playwright = None
+
+# Класс пула браузеров, которым владеет ParserThread на все время работы.
+# Каждый поток пула держит свою BrowserSession; магазины передают в пул функцию,
+# которая выполняется в потоке браузера и получает сессию первым аргументом.
+class BrowserPool:
+    def __init__(self, size=1, max_pages_per_browser=200, stop_event=None, detail_pages=4, block_policy=None,
+                 har_dir=None, har_mode=None, har_keyword=None):
+        self.size = max(1, int(size))
+        self.max_pages_per_browser = max_pages_per_browser
+        self.detail_pages = detail_pages
+        self.block_policy = block_policy
+        self.har_dir = har_dir
+        self.har_mode = har_mode
+        self.har_keyword = har_keyword
+        self._stop_event = stop_event or threading.Event()
+        self._closed = threading.Event()
+        self._tasks = queue.Queue()
+        self._threads = []
+        for i in range(self.size):
+            thread = threading.Thread(target=self._worker, name=f"BrowserPool-{i+1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _stopped(self):
+        return self._closed.is_set() or self._stop_event.is_set()
+
+    def _worker(self):
+        session = BrowserSession(
+            max_pages=self.max_pages_per_browser,
+            detail_pages=self.detail_pages,
+            block_policy=self.block_policy,
+            har_dir=self.har_dir,
+            har_mode=self.har_mode,
+            har_keyword=self.har_keyword
+        )
+        try:
+            while not self._stopped():
+                try:
+                    task = self._tasks.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if task is None:
+                    break
+                future, func, args, kwargs = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(session, *args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            session.close()
+            self._cancel_pending()
+
+    # Отменяет задачи, которые уже не будут выполнены остановленным пулом
+    def _cancel_pending(self):
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task[0].cancel()
+
+    def _alive(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def submit(self, func, *args, **kwargs):
+        if self._stopped():
+            raise RuntimeError("Пул браузеров остановлен")
+        future = Future()
+        self._tasks.put((future, func, args, kwargs))
+        return future
+
+    # Выполняет func(session, *args) в потоке браузера и возвращает результат
+    def run(self, func, *args, **kwargs):
+        future = self.submit(func, *args, **kwargs)
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeoutError:
+                if self._stopped() and not self._alive():
+                    future.cancel()
+                    raise RuntimeError("Пул браузеров остановлен")
+
+    def close(self, timeout=10):
+        self._closed.set()
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._cancel_pending()
+
+# Функция выполняет браузерную задачу в пуле, а без пула - в разовой сессии
+def run_in_browser(pool, func, *args, **kwargs):
+    if pool is not None:
+        return pool.run(func, *args, **kwargs)
+    session = BrowserSession()
+    try:
+        return func(session, *args, **kwargs)
+    finally:
+        session.close()
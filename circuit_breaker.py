@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+
+from stores import STORE_NAMES
+
+# Предохранитель магазина: после threshold ошибок подряд магазин отключается на cooldown
+# секунд (вызовы пропускаются сразу, без ожидания и таймаутов браузера), затем пропускается
+# один пробный вызов. Успех пробы включает магазин, ошибка - отключает еще на cooldown.
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Названия состояний для журнала и статистики
+STATE_NAMES = {CLOSED: "работает", OPEN: "отключен", HALF_OPEN: "проверка"}
+
+# Класс предохранителя одного магазина
+class CircuitBreaker:
+    def __init__(self, name, threshold=3, cooldown=600, on_change=None):
+        self.name = name
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self.on_change = on_change      # on_change(магазин, состояние, сообщение)
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    # Можно ли вызывать магазин сейчас. После паузы разрешается один пробный вызов.
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+            self._probing = True
+        self._notify(HALF_OPEN, f"пробный вызов после {self.cooldown:.0f} с паузы")
+        return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state == CLOSED:
+                return
+            self.state = CLOSED
+        self._notify(CLOSED, "магазин снова отвечает, опрос возобновлен")
+
+    def failure(self, error):
+        with self._lock:
+            self.failures += 1
+            if self.state == OPEN or (self.state == CLOSED and self.failures < self.threshold):
+                return
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+            failures = self.failures
+        self._notify(OPEN, f"{failures} ошибок подряд (последняя: {error}), магазин пропускается {self.cooldown:.0f} с")
+
+    # Пробный вызов не состоялся (остановка парсера): проба повторится при следующем вызове
+    def cancel_probe(self):
+        with self._lock:
+            if self.state == HALF_OPEN and self._probing:
+                self.state = OPEN
+                self._probing = False
+                self._opened_at = time.monotonic() - self.cooldown
+
+    def _notify(self, state, message):
+        logging.warning(f"[CircuitBreaker] {self.name}: {STATE_NAMES[state]} - {message}")
+        if self.on_change is not None:
+            try:
+                self.on_change(self.name, state, message)
+            except Exception as e:
+                logging.error(f"[CircuitBreaker] Ошибка обработчика состояния: {e}")
+
+_breakers = {}
+_lock = threading.Lock()
+# Ошибки текущего вызова магазина в этом потоке (магазин -> ошибка), None - вызов не отслеживается
+_local = threading.local()
+
+# Функция создает предохранители магазинов по конфигурации; on_change получает смены состояния
+def configure_circuit_breakers(config, on_change=None):
+    threshold = config.get("circuit_breaker_failures", 3)
+    cooldown = config.get("circuit_breaker_cooldown", 600)
+    with _lock:
+        _breakers.clear()
+        for name in STORE_NAMES:
+            _breakers[name] = CircuitBreaker(name, threshold, cooldown, on_change)
+
+def get_breaker(name):
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+# Функция сообщает об ошибке магазина (вызывается в обработчиках ошибок функций поиска,
+# которые возвращают [] вместо исключения, в потоке вызывающего)
+def report_failure(store, error):
+    failures = getattr(_local, "failures", None)
+    if failures is None:
+        get_breaker(store).failure(error)
+    else:
+        failures[store] = error
+
+# Функция выполняет разрешенный предохранителями (allow) вызов магазинов stores и засчитывает
+# итог каждому: ошибку - магазинам, о которых сообщил report_failure (или всем при исключении),
+# успех - остальным. on_success() вызывается, только если ни один магазин не сообщил об ошибке.
+def run_tracked(stores, call, on_success=None):
+    _local.failures = {}
+    try:
+        result = call()
+    except Exception as e:
+        for store in stores:
+            get_breaker(store).failure(e)
+        raise
+    finally:
+        failures = _local.failures
+        _local.failures = None
+    for store, error in failures.items():
+        get_breaker(store).failure(error)
+    for store in stores:
+        if store not in failures:
+            get_breaker(store).success()
+    if on_success is not None and not failures:
+        on_success()
+    return result
+
+# Функция проверяет, работает ли магазин в обычном режиме (предохранитель не сработал)
+def is_healthy(store):
+    return get_breaker(store).state == CLOSED
+
+# Функция возвращает состояния магазинов, которые сейчас не работают в обычном режиме
+def breaker_states():
+    with _lock:
+        return {name: STATE_NAMES[breaker.state] for name, breaker in _breakers.items() if breaker.state != CLOSED}
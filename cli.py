@@ -9,6 +9,7 @@ import subprocess
 from datetime import datetime
 from config import ConfigManager, GLOBAL_STATS_FILE
 from parser import ParserThread
+from stores import STORES
 
 # ANSI-коды для цветов
 ORANGE = "\033[38;5;208m"  # Оранжевый: опции меню
@@ -57,7 +58,11 @@ def progress_callback(val):
 
 def stats_callback(sess, glob):
     global LAST_STATS
-    session_str = "Сессия: " + ", ".join(f"{k}: {v}" for k, v in sess.items())
+    session_str = "Сессия: " + ", ".join(f"{k}: {v}" for k, v in sess.items() if k not in ("Скорость", "Отключены"))
+    if sess.get("Скорость"):
+        session_str += " | Вызовов/с: " + ", ".join(f"{k}: {v}" for k, v in sess["Скорость"].items())
+    if sess.get("Отключены"):
+        session_str += " | Предохранители: " + ", ".join(f"{k}: {v}" for k, v in sess["Отключены"].items())
     global_str = "Глобальная статистика: " + ", ".join(f"{k}: {v}" for k, v in glob.items())
     msg = "[STATS] " + session_str
     if msg != LAST_STATS:
@@ -345,15 +350,7 @@ def select_chat():
 ### Функции для управления магазинами и глобальными настройками
 def toggle_stores_interactive():
     config = ConfigManager.load_config()
-    stores = [
-        ("Google Play", "enable_google_play"),
-        ("App Store", "enable_app_store"),
-        ("Rustore", "enable_rustore"),
-        ("Xiaomi Global", "enable_xiaomi_global"),
-        ("Xiaomi GetApps", "enable_xiaomi_getapps"),
-        ("Galaxy Store", "enable_galaxy_store"),
-        ("Huawei AppGallery", "enable_huawei_appgallery")
-    ]
+    stores = [(store.name, store.enable_key) for store in STORES]
     print_header("Магазины приложений:")
     for idx, (name, key) in enumerate(stores):
         status = "включен" if config.get(key, True) else "отключен"
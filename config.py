@@ -3,6 +3,8 @@ import json
 import logging
 from logging.handlers import RotatingFileHandler
 
+from stores import STORE_NAMES, empty_store_counts
+
 # Определяем базовую директорию для хранения данных
 BASE_DIR = "data"
 if not os.path.exists(BASE_DIR):
@@ -13,6 +15,7 @@ CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
 GLOBAL_STATS_FILE = os.path.join(BASE_DIR, "global_stats.json")
 KNOWN_APPS_FILE = os.path.join(BASE_DIR, "known_apps.json")
 RESULTS_FILE = os.path.join(BASE_DIR, "results.json")
+VERSION_CACHE_FILE = os.path.join(BASE_DIR, "version_cache.json")
 LOG_FILE = os.path.join(BASE_DIR, "app.log")
 
 # Функция настройки логирования с использованием вращающихся файлов
@@ -39,40 +42,16 @@ def update_global_stats(new_counts):
             with open(file_path, "r", encoding="utf-8") as f:
                 global_stats = json.load(f)
         else:
-            # Инициализируем статистику по умолчанию
-            global_stats = {
-                "Google Play": 0,
-                "App Store": 0,
-                "RuStore": 0,
-                "Xiaomi Global Store": 0,
-                "Xiaomi GetApps": 0,
-                "Samsung Galaxy Store": 0,
-                "Huawei AppGallery": 0,
-                "Всего": 0
-            }
+            # Инициализируем статистику по умолчанию (все магазины реестра)
+            global_stats = dict(empty_store_counts(), **{"Всего": 0})
     except Exception as e:
         logging.error(f"Ошибка загрузки {file_path}: {e}")
-        global_stats = {
-            "Google Play": 0,
-            "App Store": 0,
-            "RuStore": 0,
-            "Xiaomi Global Store": 0,
-            "Xiaomi GetApps": 0,
-            "Samsung Galaxy Store": 0,
-            "Huawei AppGallery": 0,
-            "Всего": 0
-        }
+        global_stats = dict(empty_store_counts(), **{"Всего": 0})
     # Обновляем статистику для каждого магазина, используя данные new_counts
-    for key in ["Google Play", "App Store", "RuStore", "Xiaomi Global Store", "Xiaomi GetApps", "Samsung Galaxy Store", "Huawei AppGallery"]:
+    for key in STORE_NAMES:
         global_stats[key] = global_stats.get(key, 0) + new_counts.get(key, 0)
     # Пересчитываем общее количество приложений
-    global_stats["Всего"] = (global_stats.get("Google Play", 0) +
-                             global_stats.get("App Store", 0) +
-                             global_stats.get("RuStore", 0) +
-                             global_stats.get("Xiaomi Global Store", 0) +
-                             global_stats.get("Xiaomi GetApps", 0) +
-                             global_stats.get("Samsung Galaxy Store", 0) +
-                             global_stats.get("Huawei AppGallery", 0))
+    global_stats["Всего"] = sum(global_stats.get(key, 0) for key in STORE_NAMES)
     try:
         # Сохраняем обновлённую статистику в файл
         with open(file_path, "w", encoding="utf-8") as f:
@@ -99,6 +78,7 @@ class ConfigManager:
             "enable_rustore": True,
             "enable_xiaomi_global": True,
             "enable_xiaomi_getapps": True,  # Новый параметр для Xiaomi GetApps
+            "xiaomi_combined": True,        # Xiaomi Global и GetApps в одном контексте браузера
             "proxy": "",
             "chats": [],  # Чаты для уведомлений
             "notify_errors": False,  # Уведомления об ошибках
@@ -110,7 +90,59 @@ class ConfigManager:
             "max_results_xiaomi_global": 8,
             "max_results_xiaomi_getapps": 8,
             "max_results_samsung_galaxy": 27,
-            "max_results_huawei_appgallery": 8
+            "max_results_huawei_appgallery": 8,
+            # Пул браузеров для Playwright-магазинов:
+            "browser_pool_size": 1,        # число одновременно запущенных браузеров
+            "browser_max_pages": 200,      # перезапуск браузера после стольких страниц
+            "browser_detail_pages": 4,     # вкладок для одновременного открытия страниц приложений
+            # Блокировка ресурсов в браузере (картинки, шрифты, медиа, счетчики):
+            "browser_block_enabled": True,
+            "browser_block_resources": ["image", "font", "media"],
+            "browser_block_domains": [
+                "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+                "mc.yandex.ru", "facebook.net", "hm.baidu.com", "scorecardresearch.com"
+            ],
+            # Разрешения для магазинов: запасной путь Xiaomi Global ждет видимую иконку карточки
+            "browser_allow_resources": {"Xiaomi Global Store": ["image"]},
+            # Браузерные магазины не открывают страницы известных приложений, версия которых
+            # проверялась не раньше TTL кеша версий (запись - по данным страницы поиска)
+            "browser_skip_known": True,
+            # Одновременный опрос магазинов по ключевому слову:
+            "parallel_stores": False,
+            "store_workers": 4,
+            # HTTP-сессии для магазинов на requests:
+            "http_retries": 2,           # повторы при 429/5xx и сетевых ошибках
+            "http_backoff": 0.5,         # множитель экспоненциальной паузы между повторами
+            "http_pool_size": 10,        # соединений в пуле на один хост
+            "http_host_concurrency": 4,  # одновременных запросов к одному хосту по умолчанию
+            "http_host_limits": {"apps.rustore.ru": 6},  # отдельные лимиты для хостов
+            # Кеш версий: сколько секунд версия приложения считается свежей
+            "version_cache_default_ttl": 3600,
+            "version_cache_ttl": {},     # переопределения по магазинам, например {"RuStore": 7200}
+            # Движок опроса магазинов: "thread" (потоки) или "asyncio" (нужен пакет aiohttp)
+            "engine": "thread",
+            "async_store_concurrency": {},   # переопределения одновременности по магазинам, например {"RuStore": 6}
+            "async_keyword_concurrency": 4,   # ключевых слов группы в работе одновременно
+            # Пакетная сверка версий известных приложений магазинов с пакетным запросом
+            # (batch_lookup в реестре магазинов; App Store - через iTunes lookup)
+            "app_store_bulk_refresh": True,
+            "app_store_lookup_batch": 100,   # id приложений в одном запросе lookup
+            # Ограничение частоты вызовов по магазинам (вызовов/с), например
+            # {"App Store": {"rate": 6, "burst": 6}, "Samsung Galaxy Store": {"rate": 0.2, "max_rate": 0.5}};
+            # без настройки - значения из реестра магазинов, для браузерных - по delay_range
+            "store_rate_limits": {},
+            # Предохранитель магазина: отключение после N ошибок подряд на паузу (сек), затем пробный вызов
+            "circuit_breaker_failures": 3,
+            "circuit_breaker_cooldown": 600,
+            # Адаптивные таймауты: перцентиль наблюдаемых задержек магазина, умноженный на
+            # коэффициент, в пределах границ вида операции (после timeout_min_samples наблюдений)
+            "adaptive_timeouts": True,
+            "timeout_percentile": 95,
+            "timeout_multiplier": 1.5,
+            "timeout_min_samples": 20,
+            # Переопределения по магазинам (сек), в том числе ожидания готовности страниц браузера
+            # ("selector", "idle"): {"Huawei AppGallery": {"goto": 45, "selector": {"ceiling": 40}}}
+            "store_timeouts": {}
         }
 
         config_data = {}
@@ -127,8 +159,22 @@ class ConfigManager:
         # то берем значение по умолчанию.
         merged_config = default_config.copy()
         merged_config.update(config_data)
+        cls._migrate_browser_waits(merged_config)
         return merged_config
 
+    # Прежние постоянные таймауты ожидания браузера browser_wait_timeouts (мс) переносятся
+    # в store_timeouts (сек); значения, уже заданные в store_timeouts, не меняются
+    @staticmethod
+    def _migrate_browser_waits(config):
+        waits = config.pop("browser_wait_timeouts", None)
+        if not waits:
+            return
+        store_timeouts = {store: dict(kinds) for store, kinds in config.get("store_timeouts", {}).items()}
+        for store, kinds in waits.items():
+            for kind, value in kinds.items():
+                store_timeouts.setdefault(store, {}).setdefault(kind, value / 1000)
+        config["store_timeouts"] = store_timeouts
+
     @classmethod
     def save_config(cls, config):
         try:
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+from config import BASE_DIR
+from http_client import set_response_hook, set_replay_base
+
+# Каталог фикстур: index.json (ключевые слова записи и URL -> файл ответа),
+# http/ - тела ответов HTTP-магазинов, har/ - HAR-файлы браузерных магазинов
+# (по одному на магазин и ключевое слово)
+FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures")
+
+# Функция возвращает ключ фикстуры для URL: хост, путь и строка запроса без схемы
+def fixture_key(url):
+    parts = urlsplit(url)
+    return parts.netloc + parts.path + (f"?{parts.query}" if parts.query else "")
+
+# Класс набора фикстур на диске
+class FixtureStore:
+    def __init__(self, root=FIXTURES_DIR):
+        self.root = root
+        self.index_file = os.path.join(root, "index.json")
+        self.entries = {}
+        self.keywords = []
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def har_dir(self):
+        return os.path.join(self.root, "har")
+
+    def load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.keywords = data.get("keywords", [])
+        except Exception as e:
+            logging.error(f"Ошибка загрузки {self.index_file}: {e}")
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            data = {"keywords": self.keywords, "entries": dict(self.entries)}
+        with open(self.index_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    # Сохраняет тело ответа; url - исходный адрес запроса (до перенаправлений)
+    def add(self, url, status, content_type, body):
+        key = fixture_key(url)
+        extension = ".json" if "json" in content_type else ".html"
+        name = "http/" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + extension
+        os.makedirs(os.path.join(self.root, "http"), exist_ok=True)
+        with open(os.path.join(self.root, name), "wb") as f:
+            f.write(body)
+        with self._lock:
+            self.entries[key] = {
+                "url": url,
+                "status": status,
+                "content_type": content_type,
+                "file": name,
+                "size": len(body)
+            }
+
+    def get(self, key):
+        with self._lock:
+            return self.entries.get(key)
+
+    def read(self, entry):
+        with open(os.path.join(self.root, entry["file"]), "rb") as f:
+            return f.read()
+
+    # Текст ответа (для разбора парсерами)
+    def read_text(self, entry):
+        return self.read(entry).decode("utf-8", errors="replace")
+
+# Контекст записи: все ответы http_client сохраняются в набор фикстур
+@contextmanager
+def recording(fixtures):
+    def hook(response):
+        original = response.history[0] if response.history else response
+        fixtures.add(
+            original.request.url,
+            response.status_code,
+            response.headers.get("content-type", ""),
+            response.content
+        )
+    set_response_hook(hook)
+    try:
+        yield fixtures
+    finally:
+        set_response_hook(None)
+        fixtures.save()
+
+# Класс локального сервера воспроизведения: отвечает сохраненными телами по пути /<хост>/<путь>?<запрос>.
+# Внутри with запросы http_client перенаправляются на него (set_replay_base).
+class ReplayServer:
+    def __init__(self, fixtures, host="127.0.0.1", port=0):
+        self.fixtures = fixtures
+        self.misses = []
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                key = self.path.lstrip("/")
+                entry = server.fixtures.get(key)
+                if entry is None:
+                    server.misses.append(key)
+                    self.send_error(404)
+                    return
+                body = server.fixtures.read(entry)
+                self.send_response(entry["status"])
+                self.send_header("Content-Type", entry["content_type"] or "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, format, *args):
+                pass
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self._server.server_port}"
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ReplayServer", daemon=True)
+        self._thread.start()
+        set_replay_base(self.base_url)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        set_replay_base("")
+        self._server.shutdown()
+        self._server.server_close()
+        if self.misses:
+            logging.warning(f"[ReplayServer] Нет фикстур для {len(self.misses)} запросов, например {self.misses[0]}")
+        return False
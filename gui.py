@@ -17,6 +17,7 @@ from PyQt5.QtCore import QTimer, Qt, pyqtSignal
 from config import ConfigManager, GLOBAL_STATS_FILE, load_known_apps, save_known_apps
 from parser import ParserThread, scan_group_immediately
 from notifications import send_telegram_message
+from stores import STORE_NAMES, empty_store_counts
 
 
 # ---------------------
@@ -268,30 +269,14 @@ class MainPanel(QWidget):
             with open(GLOBAL_STATS_FILE, "r", encoding="utf-8") as f:
                 global_stats = json.load(f)
         except Exception:
-            global_stats = {
-                "Google Play": 0,
-                "App Store": 0,
-                "RuStore": 0,
-                "Xiaomi Global Store": 0,
-                "Xiaomi GetApps": 0,
-                "Samsung Galaxy Store": 0,
-                "Huawei AppGallery": 0,
+            global_stats = dict(empty_store_counts(), **{
                 "Всего": 0,
                 "Новые": 0,
                 "Точное совпадение": 0,
                 "Обновления": 0,
                 "Среднее время обработки": 0.0
-            }
-        session_stats = {
-            "Google Play": 0,
-            "App Store": 0,
-            "RuStore": 0,
-            "Xiaomi Global Store": 0,
-            "Xiaomi GetApps": 0,
-            "Samsung Galaxy Store": 0,
-            "Huawei AppGallery": 0,
-            "Всего": 0
-        }
+            })
+        session_stats = dict(empty_store_counts(), **{"Всего": 0})
         self.update_stats_table(session_stats, global_stats)
 
     def initUI(self):
@@ -345,10 +330,10 @@ class MainPanel(QWidget):
         self.stats_tab = QWidget()
         self.tabs.addTab(self.stats_tab, "Статистика")
         stats_layout = QVBoxLayout(self.stats_tab)
-        self.stats_table = QTableWidget(2, 8)
-        headers = ["Google Play", "App Store", "RuStore", "Xiaomi Global Store", "Xiaomi GetApps", "Samsung Galaxy Store", "Huawei AppGallery", "Всего"]
+        headers = STORE_NAMES + ["Всего"]
+        self.stats_table = QTableWidget(4, len(headers))
         self.stats_table.setHorizontalHeaderLabels(headers)
-        self.stats_table.setVerticalHeaderLabels(["Сессия", "Глобальная"])
+        self.stats_table.setVerticalHeaderLabels(["Сессия", "Глобальная", "Вызовов/с", "Состояние"])
         self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         stats_layout.addWidget(self.stats_table)
         self.notify_stats_label = QLabel("Уведомления:\nНовые: 0\nТочное совпадение: 0\nОбновления: 0\nСреднее время обработки: 0.00 с")
@@ -716,10 +701,17 @@ class MainPanel(QWidget):
         self.log_edit.setHtml(self.log_text)
 
     def update_stats_table(self, session_stats, global_stats):
-        stores = ["Google Play", "App Store", "RuStore", "Xiaomi Global Store", "Xiaomi GetApps", "Samsung Galaxy Store", "Huawei AppGallery", "Всего"]
+        stores = STORE_NAMES + ["Всего"]
         for col, store in enumerate(stores):
             self.stats_table.setItem(0, col, QTableWidgetItem(str(session_stats.get(store, 0))))
             self.stats_table.setItem(1, col, QTableWidgetItem(str(global_stats.get(store, 0))))
+        # Текущая скорость опроса магазинов (адаптивное ограничение частоты)
+        # и состояние предохранителей (пусто - магазин работает в обычном режиме)
+        rates = session_stats.get("Скорость", {})
+        broken = session_stats.get("Отключены", {})
+        for col, store in enumerate(STORE_NAMES):
+            self.stats_table.setItem(2, col, QTableWidgetItem(str(rates.get(store, ""))))
+            self.stats_table.setItem(3, col, QTableWidgetItem(broken.get(store, "")))
         
         new_notif = global_stats.get("Новые", 0)
         exact_notif = global_stats.get("Точное совпадение", 0)
@@ -0,0 +1,176 @@
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from stores import store_for_url
+from timeouts import measured, request_timeout
+
+# Заголовки по умолчанию для всех HTTP-запросов к магазинам
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+# Таймаут запросов к хостам не из реестра магазинов; для магазинов - адаптивный (timeouts.py)
+DEFAULT_TIMEOUT = 10
+
+# Текущие настройки HTTP-слоя (обновляются через configure_http)
+_settings = {
+    "proxy": "",
+    "retries": 2,
+    "backoff": 0.5,
+    "pool_size": 10,
+    "host_concurrency": 4
+}
+# Сессии requests по хосту: keep-alive и пул соединений для каждого магазина
+_sessions = {}
+# Ограничение одновременных запросов к одному хосту: лимиты и семафоры
+_host_limits = {}
+_host_semaphores = {}
+_lock = threading.Lock()
+# Запись и воспроизведение фикстур (fixtures.py): обработчик каждого ответа и адрес
+# локального сервера, на который перенаправляются запросы вида https://host/path -> base/host/path
+_response_hook = None
+_replay_base = ""
+# Обработчик признаков перегрузки хоста: hook(url, причина) (rate_limiter.py)
+_throttle_hook = None
+# Коды ответа, означающие, что магазин просит снизить частоту запросов
+THROTTLE_STATUSES = (429, 503)
+
+# Функция применяет настройки из конфигурации: прокси, повторы и размер пула соединений
+def configure_http(config):
+    with _lock:
+        _settings["proxy"] = (config.get("proxy", "") or "").strip()
+        _settings["retries"] = int(config.get("http_retries", 2))
+        _settings["backoff"] = float(config.get("http_backoff", 0.5))
+        _settings["pool_size"] = int(config.get("http_pool_size", 10))
+        _settings["host_concurrency"] = int(config.get("http_host_concurrency", 4))
+        _host_limits.clear()
+        _host_limits.update({host: int(limit) for host, limit in config.get("http_host_limits", {}).items()})
+        _host_semaphores.clear()
+        # Сессии со старыми настройками закрываем, новые создадутся по требованию
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def _build_session():
+    retry = Retry(
+        total=_settings["retries"],
+        backoff_factor=_settings["backoff"],
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=_settings["pool_size"],
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if _settings["proxy"]:
+        session.proxies = {"http": _settings["proxy"], "https": _settings["proxy"]}
+    return session
+
+# Функция возвращает копию текущих настроек HTTP (для асинхронного клиента)
+def http_settings():
+    with _lock:
+        settings = dict(_settings)
+        settings["host_limits"] = dict(_host_limits)
+        return settings
+
+# Функция возвращает общую сессию для хоста из URL
+def get_session(url):
+    host = urlsplit(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _build_session()
+            _sessions[host] = session
+        return session
+
+# Функция возвращает лимит одновременных запросов к хосту из URL
+def host_concurrency(url):
+    host = urlsplit(url).netloc
+    return max(1, _host_limits.get(host, _settings["host_concurrency"]))
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc
+    with _lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(host_concurrency(url))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+# Семафор хоста из URL для запросов мимо http_client (например, google_play_scraper),
+# чтобы они соблюдали тот же лимит одновременных запросов к хосту.
+# Внутри него нельзя вызывать http_get к тому же хосту.
+def host_slot(url):
+    return _host_semaphore(url)
+
+# Функция задает обработчик, который получает каждый ответ (None - отключить)
+def set_response_hook(hook):
+    global _response_hook
+    _response_hook = hook
+
+# Функция задает обработчик признаков перегрузки: hook(url, причина) (None - отключить)
+def set_throttle_hook(hook):
+    global _throttle_hook
+    _throttle_hook = hook
+
+# Функция включает перенаправление запросов на сервер воспроизведения ("" - отключить)
+def set_replay_base(base_url):
+    global _replay_base
+    _replay_base = base_url.rstrip("/")
+
+def _request(method, url, **kwargs):
+    kwargs.setdefault("timeout", request_timeout(url))
+    original_url = url
+    if _replay_base:
+        parts = urlsplit(url)
+        url = f"{_replay_base}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    try:
+        with _host_semaphore(url), measured(store_for_url(original_url), "http"):
+            response = get_session(url).request(method, url, **kwargs)
+    except requests.Timeout:
+        _report_throttle(original_url, "таймаут запроса")
+        raise
+    if _response_hook is not None:
+        _response_hook(response)
+    if response.status_code in THROTTLE_STATUSES:
+        _report_throttle(original_url, f"HTTP {response.status_code}")
+    elif is_captcha_url(response.url):
+        _report_throttle(original_url, "страница с капчей")
+    return response
+
+# Признак перенаправления на страницу проверки "не робот ли вы"
+def is_captcha_url(url):
+    url = (url or "").lower()
+    return "captcha" in url or "/sorry/" in url
+
+def _report_throttle(url, reason):
+    if _throttle_hook is not None:
+        try:
+            _throttle_hook(url, reason)
+        except Exception as e:
+            logging.warning(f"[http_client] Ошибка обработчика перегрузки: {e}")
+
+# GET-запрос через сессию хоста (таймаут по умолчанию - адаптивный таймаут магазина)
+def http_get(url, **kwargs):
+    return _request("GET", url, **kwargs)
+
+# POST-запрос через сессию хоста (таймаут по умолчанию - адаптивный таймаут магазина)
+def http_post(url, **kwargs):
+    return _request("POST", url, **kwargs)
+
+# Функция закрывает все открытые сессии (при остановке парсера)
+def close_sessions():
+    with _lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception as e:
+                logging.warning(f"[http_client] Ошибка закрытия сессии: {e}")
+        _sessions.clear()
@@ -0,0 +1,18 @@
+import threading
+
+# Накопленное время ожидания готовности страниц по магазинам (секунды)
+_wait_seconds = {}
+_lock = threading.Lock()
+
+# Функция добавляет время ожидания готовности страницы для магазина
+def record_wait(store, seconds):
+    with _lock:
+        _wait_seconds[store] = _wait_seconds.get(store, 0.0) + seconds
+
+# Функция возвращает накопленное время ожидания по магазинам (и при reset обнуляет его)
+def wait_totals(reset=False):
+    with _lock:
+        totals = dict(_wait_seconds)
+        if reset:
+            _wait_seconds.clear()
+        return totals
@@ -1,6 +1,12 @@
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 
+# Отдельная сессия Telegram: соединения с api.telegram.org переиспользуются (keep-alive),
+# а прокси, подмена адресов и запись фикстур сессий магазинов (http_client) к ней не относятся
+_telegram_session = requests.Session()
+_telegram_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 # Функция отправки сообщения в Telegram через Bot API
 def send_telegram_message(message, token, chat_id):
     # Формируем URL для обращения к Telegram Bot API с использованием токена
@@ -15,8 +21,8 @@ def send_telegram_message(message, token, chat_id):
     }
     
     try:
-        # Отправляем POST запрос с таймаутом 10 секунд
-        requests.post(url, data=payload, timeout=10)
+        # Отправляем POST запрос через сессию Telegram с таймаутом 10 секунд
+        _telegram_session.post(url, data=payload, timeout=10)
         # Логируем отправку сообщения, выводим первую строку сообщения для краткости
         logging.info(f"[Telegram] {message.splitlines()[0]}")
     except Exception as e:
@@ -1,7 +1,10 @@
+import asyncio
 import time
 import threading
 import json
 import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import re
 
@@ -12,10 +15,23 @@ from search import (
     search_rustore,
     search_xiaomi_global,
     search_xiaomi_getapps,
+    search_xiaomi_combined,
     search_galaxy_store,
     search_huawei_appgallery
 )
 from notifications import send_telegram_message
+from browser_pool import BrowserPool, resource_block_policy
+from stores import (
+    AppRecord, STORE_NAMES, XIAOMI_STORES, get_store, enabled_stores, store_limits, empty_store_counts, normalize_record,
+    canonical_app_url, canonical_unique_id
+)
+from async_engine import AsyncEngineRunner, async_engine_unavailable
+from http_client import configure_http, close_sessions
+from version_cache import configure_version_cache, get_version_cache
+from rate_limiter import configure_rate_limits, get_limiter, limiter_rates
+from circuit_breaker import configure_circuit_breakers, get_breaker, run_tracked, is_healthy, breaker_states, OPEN, CLOSED
+from metrics import wait_totals
+from timeouts import configure_timeouts, timeout_summary
 
 # ------------------------------------------------------------------------------
 # Вспомогательная функция для получения дефолтного чата (первый из списка)
@@ -83,24 +99,16 @@ def update_global_stats_final(new_counts: dict, msg_stats: dict, avg_keyword_tim
         with open("data/global_stats.json", "r", encoding="utf-8") as f:
             global_stats = json.load(f)
     except Exception:
-        global_stats = {
-            "Google Play": 0,
-            "App Store": 0,
-            "RuStore": 0,
-            "Xiaomi Global Store": 0,
-            "Xiaomi GetApps": 0,
-            "Samsung Galaxy Store": 0,
-            "Huawei AppGallery": 0,
+        global_stats = dict(empty_store_counts(), **{
             "Всего": 0,
             "Новые": 0,
             "Точное совпадение": 0,
             "Обновления": 0,
             "Среднее время обработки": 0.0
-        }
-    stores = ["Google Play", "App Store", "RuStore", "Xiaomi Global Store", "Xiaomi GetApps", "Samsung Galaxy Store", "Huawei AppGallery"]
-    for store in stores:
+        })
+    for store in STORE_NAMES:
         global_stats[store] = global_stats.get(store, 0) + new_counts.get(store, 0)
-    global_stats["Всего"] = sum(global_stats.get(store, 0) for store in stores)
+    global_stats["Всего"] = sum(global_stats.get(store, 0) for store in STORE_NAMES)
     global_stats["Новые"] = global_stats.get("Новые", 0) + msg_stats.get("новые", 0)
     global_stats["Точное совпадение"] = global_stats.get("Точное совпадение", 0) + msg_stats.get("точкое", 0)
     global_stats["Обновления"] = global_stats.get("Обновления", 0) + msg_stats.get("обновления", 0)
@@ -562,44 +570,286 @@ class ParserThread(threading.Thread):
         self.log_callback = log_callback
         self.stats_callback = stats_callback
         self.interval_callback = interval_callback
-        self.session_stats = {
-            "Google Play": 0,
-            "App Store": 0,
-            "RuStore": 0,
-            "Xiaomi Global Store": 0,
-            "Xiaomi GetApps": 0,
-            "Samsung Galaxy Store": 0,
-            "Huawei AppGallery": 0,
-            "Всего": 0
-        }
+        self.session_stats = dict(empty_store_counts(), **{"Всего": 0})
         self.msg_stats = {"новые": 0, "точкое": 0, "обновления": 0}
         self.total_keyword_time = 0.0
         self.keyword_count = 0
         self.avg_keyword_time = 0.0
+        # Известные приложения для браузерных магазинов: known_apps текущего запуска и
+        # ссылки приложений по (магазин, название) из результатов поиска
+        self._known_apps = {}
+        self._card_urls = {}
+        self._known_hits = 0
+        self._known_lock = threading.Lock()
+
+    # Формирует список включенных магазинов реестра для ключевого слова:
+    # (название, магазины вызова для предохранителя, функция поиска)
+    def _enabled_store_calls(self, keyword, limits, proxies, browser_pool):
+        stores = enabled_stores(self.config)
+        enabled_names = {store.name for store in stores}
+        known = self._known_fresh if self.config.get("browser_skip_known", True) else None
+        # Совместный поиск Xiaomi - только пока оба магазина работают; отключенный
+        # предохранителем магазин проверяется отдельно
+        xiaomi_combined = (XIAOMI_STORES <= enabled_names and self.config.get("xiaomi_combined", True)
+                           and all(is_healthy(name) for name in XIAOMI_STORES))
+        calls = []
+        for store in stores:
+            if xiaomi_combined and store.name in XIAOMI_STORES:
+                if store.name != "Xiaomi Global Store":
+                    continue
+                # Оба магазина Xiaomi - один сайт: ищем в одном контексте браузера
+                # (частота вызовов - по ограничителю Xiaomi Global Store)
+                calls.append(("Xiaomi Global Store", tuple(sorted(XIAOMI_STORES)), lambda: [normalize_record(app) for app in sum(search_xiaomi_combined(
+                    keyword,
+                    num_global=limits["Xiaomi Global Store"],
+                    num_getapps=limits["Xiaomi GetApps"],
+                    pool=browser_pool,
+                    known=known
+                ), [])]))
+                continue
+            calls.append((store.name, (store.name,), lambda store=store: store.run(keyword, limits[store.name], proxies=proxies, pool=browser_pool, known=known)))
+        return calls
+
+    # Запоминает ссылки приложений браузерных магазинов по названию: карточки без ссылки
+    # на странице поиска сверяются с известными приложениями по названию и разработчику
+    def _remember_cards(self, apps):
+        for app in apps:
+            if app.url and app.title and get_store(app.platform).kind == "browser":
+                self._card_urls[(app.platform, app.title.casefold())] = (app.url, app.developer)
+
+    # Предикат известных приложений для браузерных магазинов (вызывается из потоков браузера):
+    # карточка соответствует приложению из known_apps, версия которого проверялась не раньше
+    # TTL кеша версий. Возвращает {"url", "version", "developer"} или None.
+    def _known_fresh(self, platform, title, developer="", url=""):
+        known_url, known_developer = self._card_urls.get((platform, (title or "").casefold()), ("", ""))
+        same_developer = not (developer and known_developer and developer.casefold() != known_developer.casefold())
+        cached = get_version_cache().lookup(platform, url) if url else None
+        # Ссылки нет или кеш ее не знает (ответ API дает адрес не в той форме, под которой
+        # приложение проверялось) - сверяем по названию и разработчику с запомненной ссылкой
+        if not cached and known_url and known_url != url and same_developer:
+            url = known_url
+            cached = get_version_cache().lookup(platform, url)
+        if not cached:
+            return None
+        cached_url = canonical_app_url(platform, cached["url"])
+        unique_id = f"{platform}::{cached_url}"
+        if not any(unique_id in group_known for group_known in list(self._known_apps.values())):
+            return None
+        with self._known_lock:
+            self._known_hits += 1
+        # Разработчик из запомненной записи - только если она о том же приложении
+        if known_url not in (url, cached_url):
+            known_developer = ""
+        return {"url": cached_url, "version": cached["version"], "developer": developer or known_developer}
+
+    # Переводит ключи known_apps на ссылки в единой форме магазина (canonical_app_url):
+    # прежние ключи Galaxy Store и Huawei AppGallery (адрес открытой страницы, ссылка
+    # вида #/app/) иначе не совпали бы с записями поиска, и известные приложения
+    # пришли бы как новые. Возвращает число переведенных ключей.
+    @staticmethod
+    def _migrate_known_ids(known_apps):
+        migrated = 0
+        for group_name, group_known in known_apps.items():
+            renamed = {}
+            for unique_id, version in group_known.items():
+                key = canonical_unique_id(unique_id)
+                if key != unique_id:
+                    migrated += 1
+                if not renamed.get(key):
+                    renamed[key] = version
+            known_apps[group_name] = renamed
+        return migrated
+
+    # План цикла: сколько раз каждое ключевое слово встречается во включенных группах.
+    # Набор магазинов общий для всех групп, поэтому каждое ключевое слово ищется один раз
+    # за цикл, а результаты хранятся, пока их не получат все группы с этим словом.
+    def _plan_cycle(self):
+        keyword_uses = Counter()
+        for group in self.config.get("groups", []):
+            if group.get("enabled", True):
+                keyword_uses.update(group.get("keywords", []))
+        return keyword_uses
+
+    # Пакетная сверка версий всех известных приложений включенных групп в магазинах с пакетным
+    # запросом (batch_lookup в реестре; App Store - через iTunes lookup), раз за цикл.
+    # Возвращает словарь ключ приложения -> запись с текущей версией.
+    def _lookup_batch_versions(self, known_apps, proxies):
+        found = {}
+        for store in enabled_stores(self.config):
+            if not store.batch_lookup or store.lookup is None:
+                continue
+            prefix = f"{store.name}::"
+            urls = []
+            for group in self.config.get("groups", []):
+                if not group.get("enabled", True):
+                    continue
+                for unique_id in known_apps.get(group.get("group_name", "Без названия"), {}):
+                    if unique_id.startswith(prefix):
+                        urls.append(unique_id[len(prefix):])
+            urls = list(dict.fromkeys(urls))
+            if not urls:
+                continue
+            records = store.lookup(urls, batch_size=int(self.config.get("app_store_lookup_batch", 100)), proxies=proxies)
+            self.log_callback(f"{store.name}: пакетная сверка версий - найдено {len(records)} из {len(urls)} известных приложений.")
+            found.update((prefix + url, app) for url, app in records.items())
+        return found
+
+    # Записи пакетной сверки для известных приложений группы (ссылка - как в known_apps,
+    # чтобы ключ приложения совпал)
+    @staticmethod
+    def _batch_refreshed(group_known, batch_versions):
+        refreshed = []
+        for unique_id in group_known:
+            app = batch_versions.get(unique_id)
+            if app:
+                refreshed.append(AppRecord.from_dict(dict(app, url=unique_id.partition("::")[2])))
+        return refreshed
+
+    # Проверка обновления известного приложения: новая версия сохраняется в known_apps,
+    # а приложение попадает в результаты группы
+    @staticmethod
+    def _detect_update(group_known, group_results, app, unique_id):
+        stored_version = group_known.get(unique_id, "")
+        current_version = app.version
+        if current_version and current_version != stored_version:
+            group_known[unique_id] = current_version
+            group_results.append(app)
+
+    # Вызов магазина в пределах его скорости (rate_limiter): ожидание своей очереди,
+    # после успешного вызова скорость магазина понемногу растет. Магазин, отключенный
+    # предохранителем (circuit_breaker), пропускается сразу, без ожидания.
+    def _call_store_limited(self, store_name, breaker_stores, call):
+        allowed = [name for name in breaker_stores if get_breaker(name).allow()]
+        if len(allowed) < len(breaker_stores):
+            for name in allowed:
+                get_breaker(name).cancel_probe()
+            return []
+        limiter = get_limiter(store_name)
+        limiter.acquire(self.stop_event)
+        if self.stop_event.is_set():
+            for name in breaker_stores:
+                get_breaker(name).cancel_probe()
+            return []
+        # Частота восстанавливается только после удачного вызова: ошибка магазина,
+        # о которой сообщил report_failure, не должна поднимать ее между снижениями
+        return run_tracked(breaker_stores, call, on_success=limiter.success)
+
+    # Смена состояния предохранителя магазина: журнал и уведомление в чат ошибок
+    def _on_breaker_change(self, store, state, message):
+        if state == OPEN:
+            text = f"Магазин {store} отключен: {message}"
+        elif state == CLOSED:
+            text = f"Магазин {store} снова работает: {message}"
+        else:
+            text = f"Магазин {store}: {message}"
+        self.log_callback(text)
+        # В чат ошибок - отключение и восстановление магазина (пробные вызовы только в журнал)
+        if state not in (OPEN, CLOSED):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._notify_breaker(text)
+        else:
+            # В движке asyncio смена состояния приходит в цикле событий: запрос к Telegram
+            # (до 10 с) выполняется в пуле потоков цикла, чтобы не задерживать запросы магазинов
+            loop.run_in_executor(None, self._notify_breaker, text)
+
+    @staticmethod
+    def _notify_breaker(text):
+        try:
+            notify_error(text)
+        except Exception:
+            pass
+
+    # Поиск по всем включенным магазинам для одного ключевого слова.
+    # Без пула потоков магазины опрашиваются по очереди, с пулом - одновременно,
+    # а результаты собираются в исходном порядке магазинов.
+    def _search_keyword(self, calls, executor=None):
+        combined = []
+        if executor is None:
+            for store_name, breaker_stores, call in calls:
+                combined.extend(self._call_store_limited(store_name, breaker_stores, call))
+            return combined
+        futures = [executor.submit(self._call_store_limited, store_name, breaker_stores, call)
+                   for store_name, breaker_stores, call in calls]
+        for future in futures:
+            combined.extend(future.result())
+        return combined
 
     def run(self):
+        browser_pool = None
+        store_executor = None
+        async_runner = None
         try:
             self.config.setdefault("cycle_interval", 1500)
             cycle_interval = self.config.get("cycle_interval", 1500)
-            delay_range = self.config.get("delay_range", [2, 6])
             self.log_callback("Фоновый парсер запущен.")
             proxy_str = self.config.get("proxy", "").strip()
             proxies = {"http": proxy_str, "https": proxy_str} if proxy_str else None
+            # Общие HTTP-сессии по хостам: прокси, повторы с backoff на 429/5xx
+            configure_http(self.config)
+            # Кеш версий с TTL по магазинам (пропуск запросов страниц недавно проверенных приложений)
+            configure_version_cache(self.config)
+            # Ограничение частоты вызовов по магазинам (замедление при 429, таймаутах, капче)
+            configure_rate_limits(self.config)
+            # Предохранители магазинов: отключение после ошибок подряд и пробный вызов после паузы
+            configure_circuit_breakers(self.config, self._on_breaker_change)
+            # Таймауты запросов и браузера по наблюдаемым задержкам магазинов
+            configure_timeouts(self.config)
+
+            # Чтение лимитов из конфигурации (ключи и значения по умолчанию - из реестра магазинов)
+            limits = store_limits(self.config)
 
-            # Чтение лимитов из конфигурации
-            max_gp = self.config.get("max_results_google_play", 8)
-            max_as = self.config.get("max_results_app_store", 8)
-            max_rs = self.config.get("max_results_rustore", 20)
-            max_xm_global = self.config.get("max_results_xiaomi_global", 8)
-            max_xm_getapps = self.config.get("max_results_xiaomi_getapps", 8)
-            max_galaxy = self.config.get("max_results_samsung_galaxy", 27)
-            max_ha = self.config.get("max_results_huawei_appgallery", 8)
+            # Движок asyncio: все ключевые слова группы опрашиваются в одном цикле событий
+            if self.config.get("engine", "thread") == "asyncio":
+                reason = async_engine_unavailable()
+                if reason:
+                    self.log_callback(f"Движок asyncio недоступен ({reason}), используется потоковый.")
+                else:
+                    async_runner = AsyncEngineRunner(self.config, limits, self.stop_event,
+                                                     known=self._known_fresh if self.config.get("browser_skip_known", True) else None)
+                    self.log_callback("Используется движок asyncio.")
+            # Общий пул браузеров для Playwright-магазинов на все время работы потока
+            if async_runner is None:
+                browser_pool = BrowserPool(
+                    size=self.config.get("browser_pool_size", 1),
+                    max_pages_per_browser=self.config.get("browser_max_pages", 200),
+                    stop_event=self.stop_event,
+                    detail_pages=self.config.get("browser_detail_pages", 4),
+                    block_policy=resource_block_policy(self.config)
+                )
+            # Пул потоков для одновременного опроса магазинов по одному ключевому слову
+            if async_runner is None and self.config.get("parallel_stores", False):
+                store_executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(self.config.get("store_workers", 4))),
+                    thread_name_prefix="StoreWorker"
+                )
 
             known_apps = load_known_apps()
             for group_name in known_apps:
                 if not isinstance(known_apps[group_name], dict):
                     known_apps[group_name] = {}
+            migrated = self._migrate_known_ids(known_apps)
+            if migrated:
+                save_known_apps(known_apps)
+                self.log_callback(f"Ссылки известных приложений приведены к единой форме: {migrated}.")
+            self._known_apps = known_apps
             while not self.stop_event.is_set():
+                # Кеш версий текущего цикла (Google Play: appId -> версия) начинается заново
+                get_version_cache().begin_cycle()
+                # Версии известных приложений магазинов с пакетным запросом - несколькими
+                # запросами на весь цикл
+                batch_versions = {}
+                if self.config.get("app_store_bulk_refresh", True):
+                    batch_versions = self._lookup_batch_versions(known_apps, proxies)
+                # Результаты поиска по ключевым словам, общие для всех групп цикла
+                keyword_uses = self._plan_cycle()
+                cycle_results = {}
+                if keyword_uses:
+                    self.log_callback(f"Ключевых слов в цикле: {len(keyword_uses)} уникальных из {sum(keyword_uses.values())}.")
                 for group in self.config.get("groups", []):
                     if self.stop_event.is_set():
                         break
@@ -621,43 +871,50 @@ class ParserThread(threading.Thread):
                     group_known = known_apps[group_name]
                     group_results = []
                     notified_new_ids = set()
-                    new_counts = {
-                        "Google Play": 0,
-                        "App Store": 0,
-                        "RuStore": 0,
-                        "Xiaomi Global Store": 0,
-                        "Xiaomi GetApps": 0,
-                        "Samsung Galaxy Store": 0,
-                        "Huawei AppGallery": 0
-                    }
+                    new_counts = empty_store_counts()
+                    for app in self._batch_refreshed(group_known, batch_versions):
+                        self._detect_update(group_known, group_results, app, app.unique_id())
+                    # В движке asyncio результаты по ключевым словам группы, которые еще не искались
+                    # в этом цикле, собираются заранее
+                    prefetched = set()
+                    if async_runner is not None:
+                        pending = [kw for kw in dict.fromkeys(keywords) if kw not in cycle_results]
+                        if pending:
+                            start_prefetch = time.time()
+                            cycle_results.update(async_runner.search_keywords(pending))
+                            self.total_keyword_time += time.time() - start_prefetch
+                            prefetched.update(pending)
                     for i, keyword in enumerate(keywords):
                         if self.stop_event.is_set():
                             break
                         start_kw = time.time()
                         self.log_callback(f"[{group_name}] Обработка ключевого слова '{keyword}' ({i+1}/{len(keywords)})")
-                        # Передаем параметры num_results, взятые из конфигурации:
-                        gp = search_google_play(keyword, num_results=max_gp) if self.config.get("enable_google_play", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        ios = search_app_store(keyword, num_results=max_as, proxies=proxies) if self.config.get("enable_app_store", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        ru = search_rustore(keyword, num_results=max_rs, proxies=proxies) if self.config.get("enable_rustore", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        xiaomi = search_xiaomi_global(keyword, num_results=max_xm_global) if self.config.get("enable_xiaomi_global", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        xiaomi_getapps = search_xiaomi_getapps(keyword, num_results=max_xm_getapps) if self.config.get("enable_xiaomi_getapps", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        galaxy = search_galaxy_store(keyword, num_results=max_galaxy) if self.config.get("enable_galaxy_store", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        huawei = search_huawei_appgallery(keyword, num_results=max_ha) if self.config.get("enable_huawei_appgallery", True) else []
-                        time.sleep(random.uniform(*delay_range))
-                        combined = gp + ios + ru + xiaomi + xiaomi_getapps + galaxy + huawei
+                        # Ключевое слово, уже найденное в этом цикле другой группой, повторно не ищется
+                        searched = keyword in prefetched
+                        if async_runner is not None:
+                            combined = cycle_results.get(keyword, [])
+                        elif keyword in cycle_results:
+                            combined = cycle_results[keyword]
+                        else:
+                            # Передаем параметры num_results, взятые из конфигурации:
+                            calls = self._enabled_store_calls(keyword, limits, proxies, browser_pool)
+                            combined = self._search_keyword(calls, store_executor)
+                            cycle_results[keyword] = combined
+                            searched = True
+                        prefetched.discard(keyword)
+                        keyword_uses[keyword] -= 1
+                        if keyword_uses[keyword] <= 0:
+                            cycle_results.pop(keyword, None)
+                        if not searched:
+                            self.log_callback(f"[{group_name}] '{keyword}': результаты этого цикла уже получены, повторный поиск не нужен.")
+                        else:
+                            self._remember_cards(combined)
                         for app in combined:
-                            url = app.get("url", "") or app.get("detail_url", "")
-                            if not url:
+                            if not app.url:
                                 continue
-                            unique_id = f"{app['platform']}::{url}"
+                            unique_id = app.unique_id()
                             if unique_id not in group_known:
-                                group_known[unique_id] = app.get("version", "")
+                                group_known[unique_id] = app.version
                                 group_results.append(app)
                                 if notify_new and unique_id not in notified_new_ids:
                                     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -673,17 +930,14 @@ class ParserThread(threading.Thread):
                                             send_telegram_message(message, default_chat["telegram_token"], default_chat["telegram_chat_id"])
                                     self.msg_stats["новые"] += 1
                                     notified_new_ids.add(unique_id)
-                                if app["platform"] in new_counts:
-                                    new_counts[app["platform"]] += 1
+                                if app.platform in new_counts:
+                                    new_counts[app.platform] += 1
                             else:
-                                stored_version = group_known.get(unique_id, "")
-                                current_version = app.get("version", "")
-                                if current_version and current_version != stored_version:
-                                    group_known[unique_id] = current_version
-                                    group_results.append(app)
+                                self._detect_update(group_known, group_results, app, unique_id)
                         end_kw = time.time()
-                        self.total_keyword_time += (end_kw - start_kw)
-                        self.keyword_count += 1
+                        if searched:
+                            self.total_keyword_time += (end_kw - start_kw)
+                            self.keyword_count += 1
                         progress = int(((i+1)/len(keywords))*100)
                         self.progress_callback(progress)
                         self.log_callback(f"[{group_name}] Прогресс: {progress}%")
@@ -700,17 +954,16 @@ class ParserThread(threading.Thread):
                     updates = {}
                     exact_matches = {}
                     for app in group_results:
-                        url = app.get("url", "") or app.get("detail_url", "")
-                        if not url:
+                        if not app.url:
                             continue
-                        unique_id = f"{app['platform']}::{url}"
+                        unique_id = app.unique_id()
                         stored_version = group_known.get(unique_id, "")
-                        if app.get("version") and app.get("version") != stored_version:
+                        if app.version and app.version != stored_version:
                             if group.get("notify_update", False):
                                 updates[unique_id] = app
                         if group.get("notify_exact", False):
                             for kw in keywords:
-                                if kw.casefold() in app.get("title", "").casefold():
+                                if kw.casefold() in app.title.casefold():
                                     exact_matches[unique_id] = app
                                     break
                     if group_results:
@@ -719,7 +972,7 @@ class ParserThread(threading.Thread):
                                 data_to_save = {
                                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                                     "group": group_name,
-                                    "results": group_results
+                                    "results": [app.to_dict() for app in group_results]
                                 }
                                 f.write(json.dumps(data_to_save, ensure_ascii=False, indent=2))
                                 f.write("\n\n")
@@ -761,26 +1014,30 @@ class ParserThread(threading.Thread):
                         self.msg_stats["точкое"] += len(exact_matches)
                     else:
                         self.log_callback(f"Уведомление (точкое совпадение) не отправлено для группы '{group_name}': точных совпадений не найдено.")
-                    for key in ["Google Play", "App Store", "RuStore", "Xiaomi Global Store", "Xiaomi GetApps", "Samsung Galaxy Store", "Huawei AppGallery"]:
-                        if key not in new_counts:
-                            new_counts[key] = 0
-                    self.session_stats = {
-                        "Google Play": new_counts["Google Play"],
-                        "App Store": new_counts["App Store"],
-                        "RuStore": new_counts["RuStore"],
-                        "Xiaomi Global Store": new_counts["Xiaomi Global Store"],
-                        "Xiaomi GetApps": new_counts["Xiaomi GetApps"],
-                        "Samsung Galaxy Store": new_counts["Samsung Galaxy Store"],
-                        "Huawei AppGallery": new_counts["Huawei AppGallery"],
-                        "Всего": (new_counts["Google Play"] + new_counts["App Store"] +
-                                  new_counts["RuStore"] + new_counts["Xiaomi Global Store"] +
-                                  new_counts["Xiaomi GetApps"] + new_counts["Samsung Galaxy Store"] +
-                                  new_counts["Huawei AppGallery"])
-                    }
+                    self.session_stats = dict(new_counts, **{"Всего": sum(new_counts.values()), "Скорость": limiter_rates(), "Отключены": breaker_states()})
                     global_stats = update_global_stats_final(new_counts, self.msg_stats, self.avg_keyword_time)
                     self.stats_callback(self.session_stats, global_stats)
                     self.progress_callback(0)
                     self.log_callback(f"Цикл завершен. Ожидание {self.config.get('cycle_interval', 1500)} сек перед новым циклом.")
+                get_version_cache().save()
+                self.log_callback("Скорость магазинов (вызовов/с): " +
+                                  ", ".join(f"{store}: {rate}" for store, rate in limiter_rates().items()))
+                broken = breaker_states()
+                if broken:
+                    self.log_callback("Предохранители магазинов: " + ", ".join(f"{store}: {state}" for store, state in broken.items()))
+                with self._known_lock:
+                    known_hits, self._known_hits = self._known_hits, 0
+                if known_hits:
+                    self.log_callback(f"Известные приложения браузерных магазинов без открытия страниц за цикл: {known_hits}")
+                adapted = timeout_summary()
+                if adapted:
+                    self.log_callback("Таймауты магазинов (с): " + "; ".join(
+                        f"{store}: " + ", ".join(f"{kind} {seconds}" for kind, seconds in kinds.items())
+                        for store, kinds in adapted.items()))
+                wait_stats = wait_totals(reset=True)
+                if wait_stats:
+                    self.log_callback("Ожидание готовности страниц за цикл: " +
+                                      ", ".join(f"{store}: {seconds:.1f} с" for store, seconds in wait_stats.items()))
                 waiting_time = self.config.get("cycle_interval", 1500)
                 start_wait = time.time()
                 while time.time() - start_wait < waiting_time and not self.stop_event.is_set():
@@ -796,6 +1053,7 @@ class ParserThread(threading.Thread):
                     self.avg_keyword_time = 0.0
             self.log_callback("Фоновый парсер остановлен.")
             save_known_apps(known_apps)
+            get_version_cache().save()
         except Exception as err:
             error_message = f"Ошибка в ParserThread: {str(err)}"
             self.log_callback(error_message)
@@ -803,6 +1061,14 @@ class ParserThread(threading.Thread):
                 notify_error(error_message)
             except Exception:
                 pass
+        finally:
+            if store_executor is not None:
+                store_executor.shutdown(wait=True)
+            if browser_pool is not None:
+                browser_pool.close()
+            if async_runner is not None:
+                async_runner.close()
+            close_sessions()
 
 if __name__ == "__main__":
     pass
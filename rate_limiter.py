@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from http_client import set_throttle_hook
+from stores import STORES, store_for_url
+
+# Адаптивное ограничение частоты вызовов магазинов вместо случайной задержки после каждого
+# вызова: корзина токенов с запасом (burst) у каждого магазина. После успешного вызова
+# скорость растет на increase (до max_rate), при признаках перегрузки (HTTP 429/503,
+# таймаут, страница с капчей) уменьшается в 1/decrease раз (до min_rate), но не чаще
+# раза в cooldown секунд - пачка ошибок одного всплеска считается одним сигналом.
+
+# Ключи настроек магазина в store_rate_limits
+LIMIT_KEYS = ("rate", "burst", "min_rate", "max_rate", "increase", "decrease", "cooldown")
+
+# Класс ограничителя частоты одного магазина (вызовов в секунду)
+class RateLimiter:
+    def __init__(self, name, rate, burst=1, min_rate=None, max_rate=None, increase=None, decrease=0.5, cooldown=10):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.min_rate = float(min_rate) if min_rate else self.rate / 8
+        self.max_rate = float(max_rate) if max_rate else self.rate * 4
+        self.increase = float(increase) if increase else self.rate / 10
+        self.decrease = float(decrease)
+        self.cooldown = float(cooldown)
+        self.throttles = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._last_throttle = float("-inf")
+        self._lock = threading.Lock()
+
+    # Занимает токен и возвращает, сколько секунд нужно подождать до вызова
+    # (токен может уйти в минус - следующие вызовы встают в очередь за ним)
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    # Ожидание своей очереди (прерывается stop_event)
+    def acquire(self, stop_event=None):
+        wait = self.reserve()
+        if wait > 0:
+            if stop_event is not None:
+                stop_event.wait(wait)
+            else:
+                time.sleep(wait)
+
+    # Успешный вызов: скорость понемногу растет, если перегрузки не было в последние cooldown секунд
+    def success(self):
+        with self._lock:
+            if time.monotonic() - self._last_throttle >= self.cooldown:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    # Признак перегрузки магазина: скорость снижается, запас токенов сбрасывается
+    def throttle(self, reason):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_throttle < self.cooldown:
+                return
+            self._last_throttle = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttles += 1
+            rate = self.rate
+        logging.warning(f"[RateLimiter] {self.name}: {reason}, скорость снижена до {rate:.2f} вызовов/с")
+
+_limiters = {}
+_lock = threading.Lock()
+
+# Функция создает ограничители магазинов по конфигурации. Начальная скорость - из
+# store_rate_limits, затем из реестра магазинов; магазинам без своей скорости
+# (браузерным) - по среднему значению delay_range, как раньше.
+def configure_rate_limits(config):
+    delay_range = config.get("delay_range", [2, 6])
+    default_rate = 2.0 / max(0.1, float(delay_range[0]) + float(delay_range[1]))
+    overrides = config.get("store_rate_limits", {})
+    with _lock:
+        _limiters.clear()
+        for store in STORES:
+            settings = {"rate": store.rate or default_rate, "burst": store.burst}
+            settings.update({key: value for key, value in overrides.get(store.name, {}).items() if key in LIMIT_KEYS})
+            _limiters[store.name] = RateLimiter(store.name, **settings)
+    set_throttle_hook(report_url_throttle)
+
+# Функция возвращает ограничитель магазина (до configure_rate_limits - с настройками по умолчанию)
+def get_limiter(name):
+    with _lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(name, rate=0.25)
+        return limiter
+
+# Функция сообщает ограничителю магазина о перегрузке
+def report_throttle(store, reason):
+    get_limiter(store).throttle(reason)
+
+# Функция сообщает о перегрузке по URL запроса (магазин определяется по хосту)
+def report_url_throttle(url, reason):
+    store = store_for_url(url)
+    if store:
+        report_throttle(store, reason)
+
+# Функция возвращает текущую скорость магазинов (вызовов в секунду) для статистики
+def limiter_rates():
+    with _lock:
+        return {name: round(limiter.rate, 2) for name, limiter in _limiters.items()}
@@ -1,449 +1,1123 @@
-import requests
 import logging
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 from google_play_scraper import search as gp_search, app as gp_app
 import time
-from playwright.sync_api import sync_playwright, TimeoutError
+from playwright.sync_api import TimeoutError
 import json  # Для работы с JSON (используется в save_results_to_json)
+from concurrent.futures import ThreadPoolExecutor
+
+from browser_pool import run_in_browser
+from http_client import http_get, host_concurrency, host_slot, is_captcha_url
+from rate_limiter import report_throttle
+from circuit_breaker import report_failure
+from version_cache import get_version_cache, get_detail_flights, detail_key
+from metrics import record_wait
+from timeouts import measured, timeout_ms
+from stores import store_search, store_lookup, get_store
 
 # Глобальная настройка для включения/отключения парсера Xiaomi GetApps
 ENABLE_XIAOMI_GETAPPS = True
 
+# Быстрый разборщик HTML для частичного разбора страниц: lxml, если установлен
+try:
+    import lxml  # noqa: F401
+    FAST_HTML_PARSER = "lxml"
+except ImportError:
+    FAST_HTML_PARSER = "html.parser"
+
+# Таймауты ожидания готовности браузерных страниц (мс): появление селектора и затишье сети.
+# Адаптивные таймауты магазина (timeouts.py); постоянные значения по магазинам задаются
+# видами "selector" и "idle" параметра store_timeouts.
+def _wait_timeouts(store):
+    return {"selector": timeout_ms(store, "selector"), "idle": timeout_ms(store, "idle")}
+
+# Функция ожидает готовности страницы по событиям вместо фиксированных пауз:
+# состояние загрузки, появление селектора, затишье сети. Время ожидания учитывается в метриках.
+# answered() - проверка при таймауте: страница уже получила ответ (например, API поиска),
+# и отсутствие селектора - не ошибка магазина.
+def _wait_ready(page, store, selector=None, load_state=None, network_idle=False, answered=None):
+    timeouts = _wait_timeouts(store)
+    started = time.time()
+    try:
+        with measured(store, "selector"):
+            if load_state:
+                page.wait_for_load_state(load_state, timeout=timeouts["selector"])
+            if selector:
+                page.wait_for_selector(selector, timeout=timeouts["selector"])
+        if network_idle:
+            try:
+                with measured(store, "idle", censored=False):
+                    page.wait_for_load_state("networkidle", timeout=timeouts["idle"])
+            except TimeoutError:
+                # Фоновые запросы (счетчики, опросы) могут не затихать - это не ошибка
+                pass
+    except TimeoutError:
+        if answered is not None and answered():
+            return
+        # Страница не готова вовремя или вместо нее капча - магазину нужна меньшая частота
+        report_throttle(store, "страница с капчей" if is_captcha_url(page.url) else "таймаут ожидания страницы")
+        raise
+    finally:
+        record_wait(store, time.time() - started)
+
+# Отметка пустой выдачи на страницах поиска браузерных магазинов (текст сообщения
+# "ничего не найдено"); CSS-селектор с расширением Playwright :text-matches
+EMPTY_RESULTS_SELECTOR = ':text-matches("no (search )?results|nothing found|ничего не найдено|нет результатов", "i")'
+
+# Функция ожидает результатов страницы поиска: карточек (selector), отметки пустой выдачи
+# или, если передан captured, перехваченного ответа API поиска. Возвращает False, если
+# карточек нет - поиск ничего не нашел. Таймаут - только когда не появилось ни то, ни другое.
+def _wait_results(page, store, selector, captured=None, network_idle=False):
+    answered = (lambda: bool(captured)) if captured is not None else None
+    _wait_ready(page, store, selector=f"{selector}, {EMPTY_RESULTS_SELECTOR}", network_idle=network_idle, answered=answered)
+    return page.locator(selector).count() > 0
+
+# Функция сверяет карточки страницы поиска браузерного магазина с известными приложениями.
+# known(магазин, название, разработчик, ссылка) - предикат парсера: для известного и недавно
+# проверенного приложения он возвращает {"url", "version", "developer"}, иначе None. Такие
+# карточки записываются по данным страницы поиска, страница приложения не открывается.
+# cards - список (индекс, название, разработчик, ссылка); результат - {индекс: запись}.
+def _known_cards(known, platform, cards):
+    found = {}
+    if known is None:
+        return found
+    for i, title, developer, href in cards:
+        try:
+            detail = known(platform, title, developer, href)
+        except Exception as e:
+            logging.warning(f"[{platform}] Ошибка сверки карточки '{title}' с известными приложениями: {e}")
+            continue
+        if detail:
+            found[i] = detail
+    if found:
+        logging.info(f"[{platform}] Известных приложений без открытия страниц: {len(found)} из {len(cards)}")
+    return found
+
+# Вспомогательная функция: применяет func к элементам в max_workers потоках, сохраняя порядок
+def _map_ordered(func, items, max_workers):
+    if not items:
+        return []
+    if max_workers <= 1 or len(items) == 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+# Быстрое извлечение версий регулярными выражениями по сырому тексту страницы, без
+# построения дерева: подпись "Текущая версия" и следующий за ней span на Google Play,
+# элемент itemprop="softwareVersion" или поле softwareVersion в ld+json на RuStore.
+# Пустой результат означает, что нужен полный разбор страницы.
+_GOOGLE_PLAY_VERSION_PATTERN = re.compile(r"Текущая версия\s*</div>\s*<span[^>]*>\s*([^<]+?)\s*</span>", re.IGNORECASE)
+_RUSTORE_VERSION_PATTERNS = [
+    re.compile(r"""<(\w+)[^>]*itemprop=["']softwareVersion["'][^>]*>\s*([^<]+?)\s*</\1>"""),
+    re.compile(r'"softwareVersion"\s*:\s*"([^"]+)"'),
+]
+
+def fast_google_play_version(text):
+    match = _GOOGLE_PLAY_VERSION_PATTERN.search(text)
+    return match.group(1) if match else ""
+
+def fast_rustore_version(text):
+    for pattern in _RUSTORE_VERSION_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(match.lastindex).strip()
+    return ""
+
+# Функция извлекает версию со страницы Google Play: быстрый путь, затем полный разбор
+def parse_google_play_version(html):
+    return fast_google_play_version(html) or _parse_google_play_version_full(html)
+
+def _parse_google_play_version_full(html):
+    soup = BeautifulSoup(html, "html.parser")
+    version_label = soup.find(string=re.compile("Текущая версия", re.IGNORECASE))
+    if version_label:
+        parent = version_label.find_parent("div")
+        if parent:
+            sibling = parent.find_next_sibling("span")
+            if sibling:
+                version_text = sibling.get_text(strip=True)
+                if version_text:
+                    return version_text
+    match = re.search(r"Текущая версия.*?>([^<]+)<", html, re.IGNORECASE | re.DOTALL)
+    if match:
+        return match.group(1).strip()
+    return ""
+
+def google_play_version_url(app_id):
+    return f"https://play.google.com/store/apps/details?id={app_id}&hl=ru"
+
+def google_play_app_url(app_id):
+    return f"https://play.google.com/store/apps/details?id={app_id}"
+
 # Функция для извлечения версии приложения с Google Play по ID приложения
 def get_google_play_version(app_id):
-    url = f"https://play.google.com/store/apps/details?id={app_id}&hl=ru"
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_get(google_play_version_url(app_id))
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        version_label = soup.find(string=re.compile("Текущая версия", re.IGNORECASE))
-        if version_label:
-            parent = version_label.find_parent("div")
-            if parent:
-                sibling = parent.find_next_sibling("span")
-                if sibling:
-                    version_text = sibling.get_text(strip=True)
-                    if version_text:
-                        return version_text
-        match = re.search(r"Текущая версия.*?>([^<]+)<", response.text, re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1).strip()
+        return parse_google_play_version(response.text)
     except Exception as e:
         logging.error(f"Ошибка парсинга версии для Google Play ({app_id}): {e}")
     return ""
 
+# Функция получает версию приложения Google Play по appId: кеш текущего цикла (общий для
+# всех ключевых слов и групп), кеш версий с TTL, затем gp_app и страница приложения
+def google_play_details_version(app_id):
+    version_cache = get_version_cache()
+    version_value = version_cache.cycle_get("Google Play", app_id)
+    if version_value is not None:
+        return version_value
+    app_url = google_play_app_url(app_id)
+    version_value = version_cache.get("Google Play", app_url) or ""
+    if not version_value:
+        # Одновременные запросы того же приложения (из других ключевых слов) ждут первый
+        version_value = get_detail_flights().do(
+            detail_key("Google Play", app_url), lambda: _fetch_google_play_version(app_id, app_url)
+        )
+    version_cache.cycle_put("Google Play", app_id, version_value)
+    return version_value
+
+def _fetch_google_play_version(app_id, app_url):
+    version_value = ""
+    try:
+        with host_slot(app_url):
+            details = gp_app(app_id, lang="ru", country="ru")
+        version_value = details.get("version", "")
+    except Exception as e:
+        logging.error(f"Ошибка получения версии через gp_app для {app_id}: {e}")
+    if not version_value:
+        version_value = get_google_play_version(app_id)
+    get_version_cache().put("Google Play", app_url, version_value)
+    return version_value
+
+# Функция формирует запись Google Play из результата поиска google_play_scraper
+def google_play_record(app_data, keyword, version_value):
+    return {
+        "platform": "Google Play",
+        "keyword": keyword,
+        "title": app_data.get("title", ""),
+        "developer": app_data.get("developer", ""),
+        "url": google_play_app_url(app_data.get("appId", "")),
+        "version": version_value
+    }
+
 # Функция для поиска приложений в Google Play по ключевому слову
-def search_google_play(keyword, num_results=8):
+# (proxies - для единой сигнатуры HTTP-магазинов, прокси задается в http_client)
+@store_search("Google Play")
+def search_google_play(keyword, num_results=8, proxies=None):
     try:
-        results = gp_search(keyword, lang="ru", country="ru")
-        apps = []
-        for app_data in results[:num_results]:
-            app_id = app_data.get("appId", "")
-            version_value = app_data.get("version", "")
-            if not version_value and app_id:
-                try:
-                    details = gp_app(app_id, lang="ru", country="ru")
-                    version_value = details.get("version", "")
-                except Exception as e:
-                    logging.error(f"Ошибка получения версии через gp_app для {app_id}: {e}")
-            if not version_value and app_id:
-                version_value = get_google_play_version(app_id)
-            apps.append({
-                "platform": "Google Play",
-                "keyword": keyword,
-                "title": app_data.get("title", ""),
-                "developer": app_data.get("developer", ""),
-                "url": f"https://play.google.com/store/apps/details?id={app_id}",
-                "version": version_value
-            })
-        return apps
+        results = gp_search(keyword, lang="ru", country="ru")[:num_results]
+        # Версии приложений, которых нет в результатах поиска, запрашиваются одновременно
+        # (не больше лимита хоста play.google.com)
+        missing = list(dict.fromkeys(
+            app_data.get("appId", "") for app_data in results
+            if not app_data.get("version", "") and app_data.get("appId", "")
+        ))
+        versions = dict(zip(missing, _map_ordered(
+            google_play_details_version, missing, host_concurrency(google_play_app_url(""))
+        )))
+        return [
+            google_play_record(app_data, keyword, app_data.get("version", "") or versions.get(app_data.get("appId", ""), ""))
+            for app_data in results
+        ]
     except Exception as e:
         logging.error(f"❌ Google Play ошибка для '{keyword}': {e}")
+        report_failure("Google Play", e)
         return []
 
+APP_STORE_SEARCH_URL = "https://itunes.apple.com/search"
+
+# Функция формирует записи App Store из JSON-ответа iTunes
+def parse_app_store_results(data, keyword):
+    apps = []
+    for app in data.get("results", []):
+        apps.append({
+            "platform": "App Store",
+            "keyword": keyword,
+            "title": app.get("trackName", ""),
+            "developer": app.get("artistName", ""),
+            "url": app.get("trackViewUrl", ""),
+            "version": app.get("version", "")
+        })
+    return apps
+
 # Функция для поиска приложений в App Store (iTunes)
+@store_search("App Store")
 def search_app_store(keyword, country="US", num_results=8, proxies=None):
-    url = "https://itunes.apple.com/search"
     params = {"term": keyword, "country": country, "media": "software", "limit": num_results}
     try:
-        response = requests.get(url, params=params, timeout=10, proxies=proxies)
+        response = http_get(APP_STORE_SEARCH_URL, params=params, proxies=proxies)
         response.raise_for_status()
-        data = response.json()
-        apps = []
-        for app in data.get("results", []):
-            apps.append({
-                "platform": "App Store",
-                "keyword": keyword,
-                "title": app.get("trackName", ""),
-                "developer": app.get("artistName", ""),
-                "url": app.get("trackViewUrl", ""),
-                "version": app.get("version", "")
-            })
-        return apps
+        return parse_app_store_results(response.json(), keyword)
     except Exception as e:
         logging.error(f"❌ App Store ошибка для '{keyword}': {e}")
+        report_failure("App Store", e)
         return []
 
-# Функция для извлечения версии приложения с RuStore по URL результата
-def get_rustore_version(url_result, proxies=None):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        response = requests.get(url_result, headers=headers, timeout=10, proxies=proxies)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        version_elem = soup.find(attrs={"itemprop": "softwareVersion"})
-        if version_elem:
-            version_text = version_elem.get_text(strip=True)
+APP_STORE_LOOKUP_URL = "https://itunes.apple.com/lookup"
+_APP_STORE_TRACK_ID = re.compile(r"/id(\d+)")
+
+# Функция возвращает id приложения App Store из trackViewUrl ("" - если id в ссылке нет)
+def app_store_track_id(url):
+    match = _APP_STORE_TRACK_ID.search(url or "")
+    return match.group(1) if match else ""
+
+# Функция запрашивает текущие данные приложений App Store пачками по batch_size id
+# (один запрос lookup вместо поиска по каждому ключевому слову). Возвращает записи
+# без ключевого слова по id приложения; пачки с ошибкой пропускаются.
+def lookup_app_store(track_ids, country="US", batch_size=100, proxies=None):
+    track_ids = list(dict.fromkeys(track_id for track_id in track_ids if track_id))
+    found = {}
+    for start in range(0, len(track_ids), max(1, batch_size)):
+        batch = track_ids[start:start + max(1, batch_size)]
+        params = {"id": ",".join(batch), "country": country, "entity": "software"}
+        try:
+            response = http_get(APP_STORE_LOOKUP_URL, params=params, proxies=proxies)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logging.error(f"❌ App Store ошибка lookup ({len(batch)} id): {e}")
+            continue
+        for item, app in zip(data.get("results", []), parse_app_store_results(data, "")):
+            track_id = str(item.get("trackId", "")) or app_store_track_id(app["url"])
+            if track_id:
+                found[track_id] = app
+    return found
+
+# Пакетная сверка App Store по ссылкам известных приложений: {ссылка: запись}
+@store_lookup("App Store")
+def lookup_app_store_urls(urls, batch_size=100, proxies=None):
+    found = lookup_app_store([app_store_track_id(url) for url in urls], batch_size=batch_size, proxies=proxies)
+    return {url: found[app_store_track_id(url)] for url in urls if app_store_track_id(url) in found}
+
+# Функция извлекает версию со страницы RuStore: быстрый путь, затем полный разбор
+def parse_rustore_version(html):
+    return fast_rustore_version(html) or _parse_rustore_version_full(html)
+
+def _parse_rustore_version_full(html):
+    soup = BeautifulSoup(html, "html.parser")
+    version_elem = soup.find(attrs={"itemprop": "softwareVersion"})
+    if version_elem:
+        version_text = version_elem.get_text(strip=True)
+        if version_text:
+            return version_text
+    label = soup.find(text=re.compile("Версия", re.IGNORECASE))
+    if label:
+        parent = label.parent
+        sibling = parent.find_next_sibling()
+        if sibling:
+            version_text = sibling.get_text(strip=True)
             if version_text:
                 return version_text
-        label = soup.find(text=re.compile("Версия", re.IGNORECASE))
-        if label:
-            parent = label.parent
-            sibling = parent.find_next_sibling()
-            if sibling:
-                version_text = sibling.get_text(strip=True)
-                if version_text:
-                    return version_text
-            match = re.search(r"Версия[:\s\-]*([\d]+(?:\.[\d]+)+)", parent.get_text(" ", strip=True))
-            if match:
-                return match.group(1)
-        match = re.search(r"Версия[:\s\-]*([\d]+(?:\.[\d]+)+)", response.text)
+        match = re.search(r"Версия[:\s\-]*([\d]+(?:\.[\d]+)+)", parent.get_text(" ", strip=True))
         if match:
             return match.group(1)
+    match = re.search(r"Версия[:\s\-]*([\d]+(?:\.[\d]+)+)", html)
+    if match:
+        return match.group(1)
+    return ""
+
+# Функция для извлечения версии приложения с RuStore по URL результата
+def get_rustore_version(url_result, proxies=None):
+    try:
+        response = http_get(url_result, proxies=proxies)
+        response.raise_for_status()
+        return parse_rustore_version(response.text)
     except Exception as e:
         logging.error(f"Ошибка получения версии для RuStore ({url_result}): {e}")
     return ""
 
+RUSTORE_BASE_URL = "https://apps.rustore.ru"
+_RUSTORE_APP_LINK = re.compile(r"/catalog/app")
+_NEXT_DATA_PATTERN = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+def rustore_search_url(keyword):
+    return f"{RUSTORE_BASE_URL}/search?query={keyword}"
+
+def _rustore_record(keyword, title, description, rating, url_result):
+    return {
+        "platform": "RuStore",
+        "keyword": keyword,
+        "title": title,
+        "developer": "",
+        "description": description,
+        "rating": rating,
+        "url": url_result,
+        "version": ""
+    }
+
+# Функция разбирает страницу поиска RuStore в записи без версий (не больше num_results).
+# Сначала разбираются только ссылки на приложения, затем данные гидратации Next.js,
+# полный разбор страницы - последний вариант.
+def parse_rustore_search(html, keyword, num_results=20):
+    apps = _rustore_cards_from_links(html, keyword, num_results)
+    if not apps:
+        apps = _rustore_apps_from_hydration(html, keyword, num_results)
+    if not apps:
+        apps = _parse_rustore_search_full(html, keyword, num_results)
+    return apps
+
+# Быстрый путь: разбираются только ссылки /catalog/app с их содержимым (карточки
+# приложений), остальная страница в дерево не попадает
+def _rustore_cards_from_links(html, keyword, num_results):
+    soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=SoupStrainer("a", href=_RUSTORE_APP_LINK))
+    apps = []
+    seen_fingerprints = set()
+    for anchor in soup.find_all("a"):
+        name_tag = anchor.find("p", itemprop="name")
+        if not name_tag:
+            continue
+        title = name_tag.get_text(strip=True)
+        desc_tag = anchor.find("p", itemprop="description")
+        description = desc_tag.get_text(strip=True) if desc_tag else ""
+        rating_tag = anchor.find("span", {"data-testid": "rating"})
+        rating = rating_tag.get_text(strip=True) if rating_tag else ""
+        url_result = RUSTORE_BASE_URL + anchor.get("href").strip()
+        fingerprint = (title, description, url_result)
+        if fingerprint in seen_fingerprints:
+            continue
+        seen_fingerprints.add(fingerprint)
+        apps.append(_rustore_record(keyword, title, description, rating, url_result))
+        if len(apps) >= num_results:
+            break
+    return apps
+
+# Страница без карточек в HTML (отрисовка на клиенте): приложения из JSON гидратации __NEXT_DATA__
+def _rustore_apps_from_hydration(html, keyword, num_results):
+    match = _NEXT_DATA_PATTERN.search(html)
+    if not match:
+        return []
+    try:
+        data = json.loads(match.group(1))
+    except ValueError:
+        return []
+    apps = []
+    for package_name, item in _find_json_apps([data], ["packageName"]):
+        apps.append(_rustore_record(
+            keyword,
+            _first_field(item, JSON_TITLE_FIELDS),
+            _first_field(item, ["shortDescription"] + JSON_DESCRIPTION_FIELDS),
+            _first_field(item, ["averageUserRating", "rating"]),
+            f"{RUSTORE_BASE_URL}/catalog/app/{package_name}"
+        ))
+        if len(apps) >= num_results:
+            break
+    return apps
+
+# Полный разбор страницы поиска: карточки по классу, а если их мало - самая
+# многочисленная группа div с одинаковым набором классов
+def _parse_rustore_search_full(html, keyword, num_results):
+    soup = BeautifulSoup(html, "html.parser")
+    cards = soup.find_all("div", class_="rEyNkpHT")
+    if not cards or len(cards) < 10:
+        candidate_blocks = soup.find_all("div")
+        groups = {}
+        for block in candidate_blocks:
+            classes = block.get("class")
+            if classes:
+                key = tuple(sorted(classes))
+                groups.setdefault(key, []).append(block)
+        candidate_groups = {k: v for k, v in groups.items() if len(v) > 10}
+        if candidate_groups:
+            selected_key = max(candidate_groups.keys(), key=lambda k: len(candidate_groups[k]))
+            cards = candidate_groups[selected_key]
+    apps = []
+    seen_fingerprints = set()
+    for card in cards:
+        name_tag = card.find("p", itemprop="name")
+        title = name_tag.get_text(strip=True) if name_tag else ""
+        desc_tag = card.find("p", itemprop="description")
+        description = desc_tag.get_text(strip=True) if desc_tag else ""
+        rating_tag = card.find("span", {"data-testid": "rating"})
+        rating = rating_tag.get_text(strip=True) if rating_tag else ""
+        parent_anchor = card.find_parent("a", href=lambda h: h and "/catalog/app" in h)
+        if parent_anchor:
+            url_result = RUSTORE_BASE_URL + parent_anchor.get("href").strip()
+        else:
+            anchor = card.find("a", href=lambda h: h and "/catalog/app" in h)
+            if anchor:
+                url_result = RUSTORE_BASE_URL + anchor.get("href").strip()
+            else:
+                url_result = ""
+        fingerprint = (title, description, url_result)
+        if fingerprint in seen_fingerprints:
+            continue
+        seen_fingerprints.add(fingerprint)
+        apps.append(_rustore_record(keyword, title, description, rating, url_result))
+        if len(apps) >= num_results:
+            break
+    return apps
+
 # Функция для поиска приложений в RuStore по ключевому слову
+@store_search("RuStore")
 def search_rustore(keyword, num_results=20, proxies=None):
-    search_url = f"https://apps.rustore.ru/search?query={keyword}"
-    headers = {"User-Agent": "Mozilla/5.0"}
+    search_url = rustore_search_url(keyword)
     try:
-        response = requests.get(search_url, headers=headers, timeout=10, proxies=proxies)
+        response = http_get(search_url, proxies=proxies)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        cards = soup.find_all("div", class_="rEyNkpHT")
-        if not cards or len(cards) < 10:
-            candidate_blocks = soup.find_all("div")
-            groups = {}
-            for block in candidate_blocks:
-                classes = block.get("class")
-                if classes:
-                    key = tuple(sorted(classes))
-                    groups.setdefault(key, []).append(block)
-            candidate_groups = {k: v for k, v in groups.items() if len(v) > 10}
-            if candidate_groups:
-                selected_key = max(candidate_groups.keys(), key=lambda k: len(candidate_groups[k]))
-                cards = candidate_groups[selected_key]
-        apps = []
-        seen_fingerprints = set()
-        for card in cards:
-            name_tag = card.find("p", itemprop="name")
-            title = name_tag.get_text(strip=True) if name_tag else ""
-            desc_tag = card.find("p", itemprop="description")
-            description = desc_tag.get_text(strip=True) if desc_tag else ""
-            rating_tag = card.find("span", {"data-testid": "rating"})
-            rating = rating_tag.get_text(strip=True) if rating_tag else ""
-            parent_anchor = card.find_parent("a", href=lambda h: h and "/catalog/app" in h)
-            if parent_anchor:
-                url_result = "https://apps.rustore.ru" + parent_anchor.get("href").strip()
-            else:
-                anchor = card.find("a", href=lambda h: h and "/catalog/app" in h)
-                if anchor:
-                    url_result = "https://apps.rustore.ru" + anchor.get("href").strip()
-                else:
-                    url_result = ""
-            fingerprint = (title, description, url_result)
-            if fingerprint in seen_fingerprints:
+        apps = parse_rustore_search(response.text, keyword, num_results)
+        # Версии со страниц приложений запрашиваем параллельно (не больше лимита на хост),
+        # порядок результатов сохраняется; свежие версии берем из кеша
+        version_cache = get_version_cache()
+        detail_apps = []
+        for app in apps:
+            if not app["url"]:
                 continue
-            seen_fingerprints.add(fingerprint)
-            version_value = ""
-            if url_result:
-                version_value = get_rustore_version(url_result, proxies=proxies)
-            apps.append({
-                "platform": "RuStore",
-                "keyword": keyword,
-                "title": title,
-                "developer": "",
-                "description": description,
-                "rating": rating,
-                "url": url_result,
-                "version": version_value
-            })
-            if len(apps) >= num_results:
-                break
+            cached = version_cache.get("RuStore", app["url"])
+            if cached is not None:
+                app["version"] = cached
+            else:
+                detail_apps.append(app)
+        # Одновременные запросы той же страницы (из других ключевых слов) ждут первый
+        versions = _map_ordered(
+            lambda url: get_detail_flights().do(detail_key("RuStore", url), lambda: get_rustore_version(url, proxies=proxies)),
+            [app["url"] for app in detail_apps],
+            host_concurrency(search_url)
+        )
+        for app, version_value in zip(detail_apps, versions):
+            app["version"] = version_value
+            version_cache.put("RuStore", app["url"], version_value)
         return apps
     except Exception as e:
         logging.error(f"❌ RuStore ошибка для '{keyword}': {e}")
+        report_failure("RuStore", e)
         return []
 
-# Функция для поиска приложений в Xiaomi Global Store с использованием Playwright
-def search_xiaomi_global(keyword, num_results=8):
-    VALID_VERSION_PATTERN = re.compile(r'^\d+(?:\.\d+)+$')
+# Скрипты извлечения полей карточек за один вызов page.eval_on_selector_all
+# (вместо отдельного обращения к браузеру на каждое поле каждой карточки)
+_XIAOMI_GLOBAL_CARDS_JS = """
+cards => cards.map(card => {
+    const text = sel => { const el = card.querySelector(sel); return el ? el.innerText.trim() : ""; };
+    const link = card.closest("a[href]") || card.querySelector("a[href]");
+    return {
+        aria: card.getAttribute("aria-label") || "",
+        title: text("p[class*='app__title_']"),
+        developer: text("p.app__developer_eTDFg"),
+        has_icon: !!card.querySelector("img.icon_2wPOA"),
+        href: link ? link.href : ""
+    };
+})
+"""
+
+_XIAOMI_GETAPPS_CARDS_JS = """
+cards => cards.map(card => {
+    const button = card.querySelector("div[role='button']");
+    const link = card.closest("a[href]") || card.querySelector("a[href]");
+    return {
+        aria: button ? (button.getAttribute("aria-label") || "") : "",
+        href: link ? link.href : ""
+    };
+})
+"""
+
+_GALAXY_CARDS_JS = """
+cards => cards.map(card => {
+    const field = sel => { const el = card.querySelector(sel); return el ? (el.getAttribute("title") || el.innerText.trim()) : ""; };
+    const price = card.querySelector("#contentPrice");
+    const link = card.querySelector("a[href]");
+    return {
+        title: field("#contentName"),
+        developer: field("#contentSeller"),
+        price: price ? price.innerText.trim() : "",
+        href: link ? link.href : ""
+    };
+})
+"""
+
+_HUAWEI_TEXTS_JS = """
+elements => elements.map(el => {
+    const link = el.closest("a[href]");
+    return {text: el.innerText.trim(), href: link ? link.href : ""};
+})
+"""
+
+# Адреса JSON-API, к которым обращаются SPA-страницы Galaxy Store и Huawei AppGallery.
+# Ответы перехватываются во время загрузки страницы поиска и разбираются без обхода DOM.
+GALAXY_API_PATTERN = re.compile(r"galaxystore\.samsung\.com/api/", re.IGNORECASE)
+HUAWEI_API_PATTERN = re.compile(r"(dbankcloud\.(com|cn|ru)|hicloud\.com|appgallery\.huawei\.com).*uowap", re.IGNORECASE)
+
+# Возможные названия полей приложения в JSON-ответах магазинов
+JSON_TITLE_FIELDS = ["contentName", "productName", "appName", "name", "title"]
+JSON_DEVELOPER_FIELDS = ["sellerName", "developerName", "developer", "devName", "provider"]
+JSON_VERSION_FIELDS = ["versionName", "contentBinaryVersion", "appVersion", "version"]
+JSON_PRICE_FIELDS = ["displayPrice", "priceText", "price"]
+JSON_DESCRIPTION_FIELDS = ["memo", "editorDescribe", "description", "intro"]
+
+# Функция подписывает страницу на ответы, URL которых подходит под шаблон
+def _capture_responses(page, pattern):
+    captured = []
+    page.on("response", lambda response: captured.append(response) if pattern.search(response.url) else None)
+    return captured
+
+# Функция читает JSON из перехваченных ответов (ответы с другим содержимым пропускаются)
+def _read_json_responses(responses):
+    payloads = []
+    for response in responses:
+        try:
+            if "json" not in (response.headers.get("content-type") or ""):
+                continue
+            payloads.append(response.json())
+        except Exception as e:
+            logging.warning(f"[_read_json_responses] Ошибка чтения ответа {response.url}: {e}")
+    return payloads
+
+def _first_field(item, names):
+    for name in names:
+        value = item.get(name)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool) and str(value).strip():
+            return str(value).strip()
+    return ""
+
+# Функция обходит JSON и возвращает словари, похожие на записи приложений
+# (есть идентификатор из id_fields и название), в порядке документа без повторов
+def _find_json_apps(payloads, id_fields):
+    found = []
+    seen = set()
+    def walk(node):
+        if isinstance(node, dict):
+            app_id = _first_field(node, id_fields)
+            if app_id and _first_field(node, JSON_TITLE_FIELDS):
+                if app_id not in seen:
+                    seen.add(app_id)
+                    found.append((app_id, node))
+                return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+    for payload in payloads:
+        walk(payload)
+    return found
+
+# Адреса поиска Xiaomi: оба магазина работают на одном сайте и отличаются только параметром lo=
+def xiaomi_global_search_url(keyword):
+    return f"https://global.app.mi.com/search?lo=RU&la=ru&q={keyword}"
+
+def xiaomi_getapps_search_url(keyword):
+    return f"https://global.app.mi.com/search?lo=ID&la=ru&q={keyword}"
+
+XIAOMI_GLOBAL_VERSION_SELECTOR = "div.app-more__item_DrPSb[aria-label^='Version:']"
+XIAOMI_VERSION_PATTERN = re.compile(r'^\d+(?:\.\d+)+$')
+
+# Функция отбирает карточки Xiaomi Global Store с названием, разработчиком и иконкой
+# (не больше num_results) и возвращает список (индекс, название, разработчик, ссылка)
+def _select_xiaomi_global_cards(records, num_results):
+    selected = []
+    for i, record in enumerate(records):
+        aria_label = record["aria"]
+        name, developer = "", ""
+        if aria_label:
+            parts = aria_label.split(",")
+            for part in parts:
+                if "APP Name:" in part:
+                    name = part.split("APP Name:")[-1].strip()
+                elif "Developer:" in part:
+                    developer = part.split("Developer:")[-1].strip()
+        if not name:
+            name = record["title"]
+        if not developer:
+            developer = record["developer"]
+        if not name or not developer:
+            continue
+        if not record["has_icon"]:
+            continue
+        selected.append((i, name, developer, record["href"]))
+        if len(selected) >= num_results:
+            break
+    return selected
+
+# Функция извлекает версию из aria-label вида "Version: 1.2.3"
+def _xiaomi_global_version(aria_str):
+    if aria_str:
+        version = aria_str.split("Version:")[-1].strip()
+        if version and XIAOMI_VERSION_PATTERN.match(version):
+            return version
+    return ""
+
+# Функция отбирает первые num_results карточек Xiaomi GetApps:
+# список (индекс, название, разработчик, ссылка)
+def _select_xiaomi_getapps_cards(records, num_results):
+    selected = []
+    for i in range(min(num_results, len(records))):
+        aria_label = records[i]["aria"]
+        title = ""
+        developer = ""
+        if aria_label:
+            parts = aria_label.split(",")
+            if len(parts) >= 2:
+                title = parts[0].replace("APP Name:", "").strip()
+                developer = parts[1].replace("Developer:", "").strip()
+        selected.append((i, title, developer, records[i]["href"]))
+    return selected
+
+# Функция выбирает версию из текстов блока "Подробнее" Xiaomi GetApps (размер в MB/GB пропускается)
+def _xiaomi_getapps_version(texts):
+    for text in texts:
+        cleaned = text.strip()
+        if re.match(r'^\d+(\.\d+)+', cleaned) and not any(unit in cleaned.upper() for unit in ["MB", "GB", "KB"]):
+            return cleaned
+    return ""
+
+# Функция для поиска приложений в Xiaomi Global Store с использованием Playwright.
+# Если передан пул браузеров, поиск выполняется в уже запущенном браузере пула.
+# known - предикат известных приложений (см. _known_cards).
+@store_search("Xiaomi Global Store")
+def search_xiaomi_global(keyword, num_results=8, pool=None, known=None):
+    try:
+        return run_in_browser(pool, _xiaomi_global_worker, keyword, num_results, known)
+    except Exception as e:
+        logging.error(f"Ошибка парсинга Xiaomi Global Store по '{keyword}': {e}")
+        report_failure("Xiaomi Global Store", e)
+        return []
+
+def _xiaomi_global_worker(session, keyword, num_results, known=None):
+    with session.context(store="Xiaomi Global Store", locale="ru-RU") as context:
+        page = session.new_page(context)
+        with measured("Xiaomi Global Store", "goto"):
+            page.goto(xiaomi_global_search_url(keyword), timeout=timeout_ms("Xiaomi Global Store", "goto"))
+        return _xiaomi_global_collect(session, context, page, keyword, num_results, known)
+
+# Функция разбирает открытую страницу поиска Xiaomi Global Store
+def _xiaomi_global_collect(session, context, page, keyword, num_results, known=None):
     def extract_version(page):
-        locator = page.locator("div.app-more__item_DrPSb[aria-label^='Version:']")
+        locator = page.locator(XIAOMI_GLOBAL_VERSION_SELECTOR)
         if locator.count() > 0:
-            aria_str = locator.first.get_attribute("aria-label")
-            if aria_str:
-                version = aria_str.split("Version:")[-1].strip()
-                if version and VALID_VERSION_PATTERN.match(version):
-                    return version
+            return _xiaomi_global_version(locator.first.get_attribute("aria-label"))
         return ""
+    def open_detail(page):
+        _wait_ready(page, "Xiaomi Global Store", load_state="load")
+        return page.url, extract_version(page)
+    version_cache = get_version_cache()
     results = []
-    search_url = f"https://global.app.mi.com/search?lo=RU&la=ru&q={keyword}"
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)", locale="ru-RU")
-            page = context.new_page()
-            page.goto(search_url, timeout=30000)
-            page.wait_for_selector("div.container_oG9MN", timeout=15000)
-            cards = page.locator("div.container_oG9MN")
-            total = cards.count()
-            for i in range(total):
-                card = cards.nth(i)
-                aria_label = card.get_attribute("aria-label") or ""
-                name, developer = "", ""
-                if aria_label:
-                    parts = aria_label.split(",")
-                    for part in parts:
-                        if "APP Name:" in part:
-                            name = part.split("APP Name:")[-1].strip()
-                        elif "Developer:" in part:
-                            developer = part.split("Developer:")[-1].strip()
-                if not name:
-                    title_el = card.locator("p.app__title_rSTA+")
-                    if title_el.count() > 0:
-                        name = title_el.first.inner_text().strip()
-                if not developer:
-                    dev_el = card.locator("p.app__developer_eTDFg")
-                    if dev_el.count() > 0:
-                        developer = dev_el.first.inner_text().strip()
-                if not name or not developer:
-                    continue
-                img_locator = card.locator("img.icon_2wPOA")
-                if img_locator.count() == 0:
-                    continue
-                img_locator.wait_for(state="visible", timeout=5000)
-                with page.expect_navigation(timeout=15000):
+    if not _wait_results(page, "Xiaomi Global Store", "div.container_oG9MN"):
+        logging.info(f"[search_xiaomi_global] Ничего не найдено по '{keyword}'")
+        return results
+    cards = page.locator("div.container_oG9MN")
+    records = page.eval_on_selector_all("div.container_oG9MN", _XIAOMI_GLOBAL_CARDS_JS)
+    # Отбираем карточки с названием и разработчиком, не больше num_results
+    selected = _select_xiaomi_global_cards(records, num_results)
+    # Известные приложения - по данным карточек, свежие версии берем из кеша,
+    # остальные страницы открываем напрямую по ссылкам
+    details = {i: (detail["url"], detail["version"]) for i, detail in _known_cards(known, "Xiaomi Global Store", selected).items()}
+    to_visit = []
+    for i, name, developer, href in selected:
+        if i in details:
+            continue
+        cached = version_cache.lookup("Xiaomi Global Store", href)
+        if cached:
+            details[i] = (cached["url"], cached["version"])
+        elif href:
+            to_visit.append((i, href))
+    visited = session.visit_pages(context, [href for _, href in to_visit], open_detail, platform="Xiaomi Global Store")
+    for (i, href), detail in zip(to_visit, visited):
+        if detail:
+            details[i] = detail
+            version_cache.put("Xiaomi Global Store", detail[0], detail[1], aliases=(href,))
+    # Карточки без ссылки открываем кликом по иконке, как раньше
+    for i, name, developer, href in selected:
+        if href or i in details:
+            continue
+        try:
+            img_locator = cards.nth(i).locator("img.icon_2wPOA")
+            with measured("Xiaomi Global Store", "element"):
+                img_locator.wait_for(state="visible", timeout=timeout_ms("Xiaomi Global Store", "element"))
+            with measured("Xiaomi Global Store", "navigation"):
+                with page.expect_navigation(timeout=timeout_ms("Xiaomi Global Store", "navigation")):
                     img_locator.click()
-                detail_url = page.url
-                version = extract_version(page)
-                results.append({
-                    "platform": "Xiaomi Global Store",
-                    "keyword": keyword,
-                    "title": name,
-                    "developer": developer,
-                    "url": detail_url,
-                    "version": version
-                })
-                if len(results) >= num_results:
-                    break
-                page.go_back(timeout=15000)
-                page.wait_for_selector("div.container_oG9MN", timeout=15000)
-            browser.close()
-            return results
-    except Exception as e:
-        logging.error(f"Ошибка парсинга Xiaomi Global Store по '{keyword}': {e}")
-        return []
+            details[i] = (page.url, extract_version(page))
+            version_cache.put("Xiaomi Global Store", details[i][0], details[i][1])
+            with measured("Xiaomi Global Store", "navigation"):
+                page.go_back(timeout=timeout_ms("Xiaomi Global Store", "navigation"))
+            _wait_ready(page, "Xiaomi Global Store", selector="div.container_oG9MN")
+        except Exception as e:
+            logging.error(f"[search_xiaomi_global] Ошибка перехода к '{name}': {e}")
+    for i, name, developer, href in selected:
+        if i not in details:
+            continue
+        detail_url, version = details[i]
+        results.append({
+            "platform": "Xiaomi Global Store",
+            "keyword": keyword,
+            "title": name,
+            "developer": developer,
+            "url": detail_url,
+            "version": version
+        })
+    return results
 
 # Новая функция для поиска приложений в Xiaomi GetApps (наша доработка)
-def search_xiaomi_getapps(keyword, num_results=8):
-    results = []
+@store_search("Xiaomi GetApps")
+def search_xiaomi_getapps(keyword, num_results=8, pool=None, known=None):
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)", locale="ru-RU")
-            page = context.new_page()
-            search_url = f"https://global.app.mi.com/search?lo=ID&la=ru&q={keyword}"
-            page.goto(search_url, timeout=30000)
-            page.wait_for_selector("div.search-result__item__container_KFv1n", timeout=15000)
-            cards = page.locator("div.search-result__item__container_KFv1n")
-            total = cards.count()
-            for i in range(min(num_results, total)):
-                card = cards.nth(i)
-                clickable = card.locator("div[role='button']")
-                clickable.wait_for(state="visible", timeout=5000)
-                aria_label = clickable.get_attribute("aria-label") or ""
-                title = ""
-                developer = ""
-                if aria_label:
-                    parts = aria_label.split(",")
-                    if len(parts) >= 2:
-                        title = parts[0].replace("APP Name:", "").strip()
-                        developer = parts[1].replace("Developer:", "").strip()
-                with page.expect_navigation(timeout=15000):
-                    clickable.click()
-                time.sleep(1)
-                description = ""
-                try:
-                    desc_locator = page.locator("p.app-info__brief_Ewrks")
-                    desc_locator.wait_for(timeout=10000)
-                    if desc_locator.count() > 0:
-                        description = desc_locator.first.inner_text().strip()
-                except Exception as e:
-                    logging.warning(f"Не найден селектор описания для '{title}': {e}")
-                version = ""
-                try:
-                    all_texts = page.locator("div.app-more__item__content_YMXlz").all_inner_texts()
-                    for text in all_texts:
-                        cleaned = text.strip()
-                        if re.match(r'^\d+(\.\d+)+', cleaned) and not any(unit in cleaned.upper() for unit in ["MB", "GB", "KB"]):
-                            version = cleaned
-                            break
-                except Exception as e:
-                    logging.warning(f"Ошибка извлечения версии для '{title}': {e}")
-                app_url = page.url
-                results.append({
-                    "platform": "Xiaomi GetApps",
-                    "keyword": keyword,
-                    "title": title,
-                    "developer": developer,
-                    "version": version,
-                    "description": description,
-                    "url": app_url
-                })
-                if len(results) >= num_results:
-                    break
-                page.go_back(timeout=15000)
-                page.wait_for_selector("div.search-result__item__container_KFv1n", timeout=15000)
-            browser.close()
-        return results
+        return run_in_browser(pool, _xiaomi_getapps_worker, keyword, num_results, known)
     except Exception as e:
         logging.error(f"❌ Xiaomi GetApps ошибка для '{keyword}': {e}")
+        report_failure("Xiaomi GetApps", e)
         return []
 
+def _xiaomi_getapps_worker(session, keyword, num_results, known=None):
+    with session.context(store="Xiaomi GetApps", locale="ru-RU") as context:
+        page = session.new_page(context)
+        with measured("Xiaomi GetApps", "goto"):
+            page.goto(xiaomi_getapps_search_url(keyword), timeout=timeout_ms("Xiaomi GetApps", "goto"))
+        return _xiaomi_getapps_collect(session, context, page, keyword, num_results, known)
+
+# Функция разбирает открытую страницу поиска Xiaomi GetApps
+def _xiaomi_getapps_collect(session, context, page, keyword, num_results, known=None):
+    # Читает описание и версию с открытой страницы приложения
+    def open_detail(page):
+        app_url = page.url
+        description = ""
+        try:
+            desc_locator = page.locator("p.app-info__brief_Ewrks")
+            _wait_ready(page, "Xiaomi GetApps", selector="p.app-info__brief_Ewrks")
+            if desc_locator.count() > 0:
+                description = desc_locator.first.inner_text().strip()
+        except Exception as e:
+            logging.warning(f"Не найден селектор описания для '{app_url}': {e}")
+        version = ""
+        try:
+            version = _xiaomi_getapps_version(page.locator("div.app-more__item__content_YMXlz").all_inner_texts())
+        except Exception as e:
+            logging.warning(f"Ошибка извлечения версии для '{app_url}': {e}")
+        return app_url, description, version
+    version_cache = get_version_cache()
+    results = []
+    if not _wait_results(page, "Xiaomi GetApps", "div.search-result__item__container_KFv1n"):
+        logging.info(f"[search_xiaomi_getapps] Ничего не найдено по '{keyword}'")
+        return results
+    cards = page.locator("div.search-result__item__container_KFv1n")
+    records = page.eval_on_selector_all("div.search-result__item__container_KFv1n", _XIAOMI_GETAPPS_CARDS_JS)
+    selected = _select_xiaomi_getapps_cards(records, num_results)
+    # Известные приложения - по данным карточек (без описания), свежие версии берем из кеша,
+    # страницы остальных открываем напрямую по ссылкам из карточек
+    known_details = _known_cards(known, "Xiaomi GetApps", selected)
+    details = {i: (detail["url"], "", detail["version"]) for i, detail in known_details.items()}
+    fresh = set(details)
+    to_visit = []
+    for i, title, developer, href in selected:
+        if not href or i in details:
+            continue
+        cached = version_cache.lookup("Xiaomi GetApps", href)
+        if cached:
+            details[i] = (cached["url"], "", cached["version"])
+            fresh.add(i)
+        else:
+            to_visit.append((i, href))
+    visited = session.visit_pages(context, [href for _, href in to_visit], open_detail, platform="Xiaomi GetApps")
+    for (i, href), detail in zip(to_visit, visited):
+        if detail:
+            details[i] = detail
+    # Карточки без ссылки открываем кликом, как раньше
+    for i, title, developer, href in selected:
+        if href or i in details:
+            continue
+        try:
+            clickable = cards.nth(i).locator("div[role='button']")
+            with measured("Xiaomi GetApps", "element"):
+                clickable.wait_for(state="visible", timeout=timeout_ms("Xiaomi GetApps", "element"))
+            with measured("Xiaomi GetApps", "navigation"):
+                with page.expect_navigation(timeout=timeout_ms("Xiaomi GetApps", "navigation")):
+                    clickable.click()
+            details[i] = open_detail(page)
+            with measured("Xiaomi GetApps", "navigation"):
+                page.go_back(timeout=timeout_ms("Xiaomi GetApps", "navigation"))
+            _wait_ready(page, "Xiaomi GetApps", selector="div.search-result__item__container_KFv1n")
+        except Exception as e:
+            logging.error(f"[search_xiaomi_getapps] Ошибка перехода к '{title}': {e}")
+    for i, title, developer, href in selected:
+        if i not in details:
+            continue
+        app_url, description, version = details[i]
+        if i not in fresh:
+            version_cache.put("Xiaomi GetApps", app_url, version, aliases=(href,))
+        results.append({
+            "platform": "Xiaomi GetApps",
+            "keyword": keyword,
+            "title": title,
+            "developer": developer,
+            "version": version,
+            "description": description,
+            "url": app_url
+        })
+    return results
+
+# Функция для совместного поиска в Xiaomi Global Store и Xiaomi GetApps: обе страницы
+# поиска открываются одновременно в одном контексте браузера (общие cookies и кеш сайта).
+# Возвращает пару списков - такие же, как у search_xiaomi_global и search_xiaomi_getapps.
+def search_xiaomi_combined(keyword, num_global=8, num_getapps=8, pool=None, known=None):
+    try:
+        global_results, getapps_results, errors = run_in_browser(pool, _xiaomi_combined_worker, keyword, num_global, num_getapps, known)
+    except Exception as e:
+        logging.error(f"Ошибка совместного парсинга Xiaomi по '{keyword}': {e}")
+        errors = {"Xiaomi Global Store": e, "Xiaomi GetApps": e}
+        global_results, getapps_results = [], []
+    # Ошибки отдельных магазинов сообщаются предохранителю в потоке вызывающего
+    for store, error in errors.items():
+        report_failure(store, error)
+    return global_results, getapps_results
+
+def _xiaomi_combined_worker(session, keyword, num_global, num_getapps, known=None):
+    global_results, getapps_results = [], []
+    errors = {}
+    with session.context(store="Xiaomi Global Store", locale="ru-RU") as context:
+        global_page = session.new_page(context)
+        getapps_page = session.new_page(context)
+        # Запускаем загрузку обеих страниц и дожидаемся готовности уже при разборе
+        with measured("Xiaomi Global Store", "commit"):
+            global_page.goto(xiaomi_global_search_url(keyword), timeout=timeout_ms("Xiaomi Global Store", "commit"), wait_until="commit")
+        with measured("Xiaomi GetApps", "commit"):
+            getapps_page.goto(xiaomi_getapps_search_url(keyword), timeout=timeout_ms("Xiaomi GetApps", "commit"), wait_until="commit")
+        try:
+            global_results = _xiaomi_global_collect(session, context, global_page, keyword, num_global, known)
+        except Exception as e:
+            logging.error(f"Ошибка парсинга Xiaomi Global Store по '{keyword}': {e}")
+            errors["Xiaomi Global Store"] = e
+        try:
+            getapps_results = _xiaomi_getapps_collect(session, context, getapps_page, keyword, num_getapps, known)
+        except Exception as e:
+            logging.error(f"❌ Xiaomi GetApps ошибка для '{keyword}': {e}")
+            errors["Xiaomi GetApps"] = e
+    return global_results, getapps_results, errors
+
+def galaxy_search_url(keyword):
+    return f"https://galaxystore.samsung.com/search?q={keyword}"
+
+# Функция ищет версию вида X.Y.Z в тексте страницы приложения Galaxy Store
+def _galaxy_version_from_text(page_text):
+    match = re.search(r"(\d+)\.(\d+)\.(\d+)", page_text)
+    if match:
+        version = ".".join(match.groups())
+        logging.info(f"[extract_version] Найдена версия: {version}")
+        return version
+    logging.info("[extract_version] Версия не найдена по шаблону.")
+    return ""
+
+# Функция отбирает индексы карточек Galaxy Store с названием и разработчиком (среди первых num_results)
+def _select_galaxy_cards(records, num_results):
+    selected = []
+    for i in range(min(num_results, len(records))):
+        if not records[i]["title"] or not records[i]["developer"]:
+            logging.info(f"[search_galaxy_store] Пропуск карточки {i+1}: недостаточно данных")
+            continue
+        selected.append(i)
+    return selected
+
 # Функция для поиска приложений в Samsung Galaxy Store с использованием Playwright
-def search_galaxy_store(keyword, num_results=27):
+@store_search("Samsung Galaxy Store")
+def search_galaxy_store(keyword, num_results=27, pool=None, known=None):
+    try:
+        return run_in_browser(pool, _galaxy_store_worker, keyword, num_results, known)
+    except Exception as e:
+        logging.error(f"Ошибка парсинга Galaxy Store по '{keyword}': {e}")
+        report_failure("Samsung Galaxy Store", e)
+        return []
+
+def _galaxy_store_worker(session, keyword, num_results, known=None):
     def extract_version(page):
         try:
-            page_text = page.inner_text("body")
-            match = re.search(r"(\d+)\.(\d+)\.(\d+)", page_text)
-            if match:
-                version = ".".join(match.groups())
-                logging.info(f"[extract_version] Найдена версия: {version}")
-                return version
-            else:
-                logging.info("[extract_version] Версия не найдена по шаблону.")
-                return ""
+            return _galaxy_version_from_text(page.inner_text("body"))
         except Exception as e:
             logging.error(f"[extract_version] Ошибка при поиске версии: {e}")
             return ""
     
+    def open_detail(page):
+        _wait_ready(page, "Samsung Galaxy Store", load_state="load", network_idle=True)
+        detail_url = page.url
+        logging.info(f"[search_galaxy_store] Детальный URL: {detail_url}")
+        return detail_url, extract_version(page)
+    
     def click_image_get_detail_info(page, card_index: int):
         card_locator = page.locator("li.MuiGridListTile-root").nth(card_index)
         image_locator = card_locator.locator("div.MuiGridListTile-tile img").first
-        timeout_val = 5000
+        timeout_val = timeout_ms("Samsung Galaxy Store", "element")
         # Для первой карточки можно увеличить таймаут, если необходимо
         if card_index == 0:
-            timeout_val = 8000  
+            timeout_val = int(timeout_val * 1.6)
         try:
             logging.info(f"[click_image_get_detail_info] Нажимаем на изображение карточки {card_index+1}")
-            element = image_locator.element_handle(timeout=timeout_val)
+            with measured("Samsung Galaxy Store", "element"):
+                element = image_locator.element_handle(timeout=timeout_val)
             if not element:
                 logging.error("[click_image_get_detail_info] Не удалось найти элемент изображения")
                 return "", ""
-            with page.expect_navigation(timeout=15000):
-                element.evaluate("el => el.click()")
-            page.wait_for_load_state("load", timeout=15000)
-            detail_url = page.url
-            logging.info(f"[click_image_get_detail_info] Детальный URL: {detail_url}")
-            version_info = extract_version(page)
-            page.go_back()
-            page.wait_for_load_state("load", timeout=15000)
-            time.sleep(2)
+            with measured("Samsung Galaxy Store", "navigation"):
+                with page.expect_navigation(timeout=timeout_ms("Samsung Galaxy Store", "navigation")):
+                    element.evaluate("el => el.click()")
+            detail_url, version_info = open_detail(page)
+            with measured("Samsung Galaxy Store", "navigation"):
+                page.go_back(timeout=timeout_ms("Samsung Galaxy Store", "navigation"))
+            _wait_ready(page, "Samsung Galaxy Store", selector="li.MuiGridListTile-root")
             return detail_url, version_info
         except Exception as e:
             logging.error(f"[click_image_get_detail_info] Ошибка при переходе: {e}")
             return "", ""
     
+    version_cache = get_version_cache()
     apps = []
-    search_url = f"https://galaxystore.samsung.com/search?q={keyword}"
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True, args=["--disable-gpu", "--no-sandbox"])
-            context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-            page = context.new_page()
-            page.goto(search_url)
-            page.wait_for_selector("li.MuiGridListTile-root", timeout=15000)
-            time.sleep(2)
-            card_locator = page.locator("li.MuiGridListTile-root")
-            total_cards = card_locator.count()
-            logging.info(f"[search_galaxy_store] Найдено карточек: {total_cards}")
-            limit = min(num_results, total_cards)
-            for i in range(limit):
-                try:
-                    card = card_locator.nth(i)
-                    
-                    # Извлечение названия с обработкой исключений
-                    title_elem = card.locator("#contentName")
-                    try:
-                        if title_elem.count() > 0:
-                            title = title_elem.first.get_attribute("title") or title_elem.first.inner_text().strip()
-                        else:
-                            title = ""
-                    except Exception as e:
-                        logging.error(f"[search_galaxy_store] Ошибка получения названия карточки {i+1}: {e}")
-                        title = ""
-                    
-                    # Извлечение разработчика
-                    seller_elem = card.locator("#contentSeller")
-                    try:
-                        if seller_elem.count() > 0:
-                            developer = seller_elem.first.get_attribute("title") or seller_elem.first.inner_text().strip()
-                        else:
-                            developer = ""
-                    except Exception as e:
-                        logging.error(f"[search_galaxy_store] Ошибка получения разработчика карточки {i+1}: {e}")
-                        developer = ""
-                    
-                    # Извлечение цены
-                    price_elem = card.locator("#contentPrice")
-                    try:
-                        if price_elem.count() > 0:
-                            price = price_elem.first.inner_text().strip()
-                        else:
-                            price = ""
-                    except Exception as e:
-                        logging.error(f"[search_galaxy_store] Ошибка получения цены карточки {i+1}: {e}")
-                        price = ""
-                    
-                    logging.info(f"[search_galaxy_store] Обрабатываем карточку {i+1}/{limit}: '{title}' от '{developer}'")
-                    detail_url, version_info = click_image_get_detail_info(page, i)
-                    
-                    if not title or not developer or not detail_url:
-                        logging.info(f"[search_galaxy_store] Пропуск карточки {i+1}: недостаточно данных")
-                        continue
-                    
-                    app_data = {
-                        "platform": "Samsung Galaxy Store",
-                        "keyword": keyword,
-                        "title": title,
-                        "developer": developer,
-                        "price": price,
-                        "detail_url": detail_url,
-                        "version": version_info,
-                    }
-                    apps.append(app_data)
-                except Exception as e:
-                    logging.error(f"[search_galaxy_store] Ошибка обработки карточки {i+1}: {e}")
-                    continue
-            browser.close()
+    search_url = galaxy_search_url(keyword)
+    with session.context(store="Samsung Galaxy Store") as context:
+        page = session.new_page(context)
+        captured = _capture_responses(page, GALAXY_API_PATTERN)
+        with measured("Samsung Galaxy Store", "goto"):
+            page.goto(search_url, timeout=timeout_ms("Samsung Galaxy Store", "goto"))
+        # Ждем карточки (или пустую выдачу) и затишье сети, чтобы ответы API поиска успели прийти
+        has_cards = _wait_results(page, "Samsung Galaxy Store", "li.MuiGridListTile-root", captured, network_idle=True)
+        # Основной путь: записи из JSON, который страница загрузила сама
+        apps = _galaxy_apps_from_json(_read_json_responses(captured), keyword, num_results)
+        if apps:
+            logging.info(f"[search_galaxy_store] Из ответов API получено записей: {len(apps)}")
+            missing = []
+            for app in apps:
+                if not app["version"]:
+                    cached = version_cache.get("Samsung Galaxy Store", app["url"])
+                    if cached is not None:
+                        app["version"] = cached
+                    else:
+                        missing.append(app)
+            # Известные приложения - по данным ответа API, без открытия страниц
+            known_details = _known_cards(known, "Samsung Galaxy Store", [(n, app["title"], app["developer"], app["url"]) for n, app in enumerate(missing)])
+            for n, detail in known_details.items():
+                missing[n]["url"], missing[n]["version"] = detail["url"], detail["version"]
+            missing = [app for n, app in enumerate(missing) if n not in known_details]
+            # Версию открываем на странице приложения только если ее нет в ответе API и в кеше
+            visited = session.visit_pages(context, [app["url"] for app in missing], open_detail, platform="Samsung Galaxy Store")
+            # Запись получает адрес открытой страницы - тот же, что у карточек запасного пути
+            for app, detail in zip(missing, visited):
+                if detail:
+                    version_cache.put("Samsung Galaxy Store", detail[0], detail[1], aliases=(app["url"],))
+                    app["url"], app["version"] = detail[0], detail[1]
             return apps
-    except Exception as e:
-        logging.error(f"Ошибка парсинга Galaxy Store по '{keyword}': {e}")
-        return []
+        if not has_cards:
+            logging.info(f"[search_galaxy_store] Ничего не найдено по '{keyword}'")
+            return apps
+        # Запасной путь: разбор карточек на странице
+        records = page.eval_on_selector_all("li.MuiGridListTile-root", _GALAXY_CARDS_JS)
+        total_cards = len(records)
+        logging.info(f"[search_galaxy_store] Найдено карточек: {total_cards}")
+        selected = _select_galaxy_cards(records, num_results)
+        # Известные приложения - по данным карточек, свежие версии берем из кеша,
+        # остальные страницы открываем напрямую по ссылкам
+        cards = [(i, records[i]["title"], records[i]["developer"], records[i]["href"]) for i in selected]
+        details = {i: (detail["url"], detail["version"]) for i, detail in _known_cards(known, "Samsung Galaxy Store", cards).items()}
+        to_visit = []
+        for i in selected:
+            if i in details:
+                continue
+            href = records[i]["href"]
+            cached = version_cache.lookup("Samsung Galaxy Store", href)
+            if cached:
+                details[i] = (cached["url"], cached["version"])
+            elif href:
+                to_visit.append((i, href))
+        logging.info(f"[search_galaxy_store] Известных и из кеша: {len(details)}, к открытию: {len(to_visit)}")
+        visited = session.visit_pages(context, [href for _, href in to_visit], open_detail, platform="Samsung Galaxy Store")
+        for (i, href), detail in zip(to_visit, visited):
+            if detail:
+                details[i] = detail
+                version_cache.put("Samsung Galaxy Store", detail[0], detail[1], aliases=(href,))
+        # Карточки без ссылки открываем кликом по изображению, как раньше
+        for i in selected:
+            if records[i]["href"] or i in details:
+                continue
+            detail_url, version_info = click_image_get_detail_info(page, i)
+            if detail_url:
+                details[i] = (detail_url, version_info)
+                version_cache.put("Samsung Galaxy Store", detail_url, version_info)
+        for i in selected:
+            detail_url, version_info = details.get(i, ("", ""))
+            if not detail_url:
+                logging.info(f"[search_galaxy_store] Пропуск карточки {i+1}: недостаточно данных")
+                continue
+            apps.append({
+                "platform": "Samsung Galaxy Store",
+                "keyword": keyword,
+                "title": records[i]["title"],
+                "developer": records[i]["developer"],
+                "price": records[i]["price"],
+                "url": detail_url,
+                "version": version_info,
+            })
+    return apps
+
+# Функция строит записи Galaxy Store из перехваченных JSON-ответов поиска
+def _galaxy_apps_from_json(payloads, keyword, num_results):
+    apps = []
+    # id - имя пакета, как в ссылках карточек на страницу приложения (guid - запасной вариант)
+    for app_id, item in _find_json_apps(payloads, ["packageName", "appId", "guid"]):
+        title = _first_field(item, JSON_TITLE_FIELDS)
+        developer = _first_field(item, JSON_DEVELOPER_FIELDS)
+        if not developer:
+            continue
+        apps.append({
+            "platform": "Samsung Galaxy Store",
+            "keyword": keyword,
+            "title": title,
+            "developer": developer,
+            "price": _first_field(item, JSON_PRICE_FIELDS),
+            "url": get_store("Samsung Galaxy Store").app_url(app_id),
+            "version": _first_field(item, JSON_VERSION_FIELDS),
+        })
+        if len(apps) >= num_results:
+            break
+    return apps
+
+# Функция строит записи Huawei AppGallery из перехваченных JSON-ответов поиска
+def _huawei_apps_from_json(payloads, keyword, num_results):
+    apps = []
+    for app_id, item in _find_json_apps(payloads, ["appid", "appId"]):
+        title = _first_field(item, JSON_TITLE_FIELDS)
+        if any(app["title"] == title for app in apps):
+            continue
+        apps.append({
+            "platform": "Huawei AppGallery",
+            "keyword": keyword,
+            "title": title,
+            "description": _first_field(item, JSON_DESCRIPTION_FIELDS),
+            "url": get_store("Huawei AppGallery").app_url(app_id),
+            "version": _first_field(item, JSON_VERSION_FIELDS),
+            "developer": _first_field(item, JSON_DEVELOPER_FIELDS),
+        })
+        if len(apps) >= num_results:
+            break
+    return apps
+
+def huawei_search_url(keyword):
+    return f"https://appgallery.huawei.com/#/search/{keyword}"
+
+# XPath значений блока сведений на странице приложения Huawei
+HUAWEI_VERSION_XPATH = "//div[@class='appSingleInfo' and .//div[contains(text(), 'Версия')]]//div[@class='info_val']"
+HUAWEI_DEVELOPER_XPATH = "//div[@class='appSingleInfo' and .//div[contains(text(), 'Разработчик')]]//div[@class='info_val']"
+
+# Функция отбирает уникальные по названию карточки Huawei, не больше num_results.
+# Каждый результат на странице - пара элементов: заголовок и описание.
+def _select_huawei_cards(items, num_results):
+    total_cards = len(items) // 2
+    logging.info(f"[search_huawei_appgallery] Найдено карточек: {total_cards}")
+    selected = []
+    for i in range(total_cards):
+        if len(selected) >= num_results:
+            break
+        title = items[i * 2]["text"]
+        description = items[i * 2 + 1]["text"]
+        if not title:
+            logging.info(f"[search_huawei_appgallery] Пропуск карточки {i+1}: недостаточно данных")
+            continue
+        if any(card[1] == title for card in selected):
+            logging.info(f"[search_huawei_appgallery] Карточка '{title}' уже добавлена, пропускаем.")
+            continue
+        selected.append((i, title, description, items[i * 2]["href"]))
+    return selected
 
 # Функция для извлечения деталей (версии и разработчика) со страницы приложения
 def extract_app_details(page):
     version = ""
     developer = ""
     try:
-        page.wait_for_selector("div.appSingleInfo", timeout=10000)
-        version_locator = page.locator("//div[@class='appSingleInfo' and .//div[contains(text(), 'Версия')]]//div[@class='info_val']")
-        developer_locator = page.locator("//div[@class='appSingleInfo' and .//div[contains(text(), 'Разработчик')]]//div[@class='info_val']")
+        _wait_ready(page, "Huawei AppGallery", selector="div.appSingleInfo")
+        version_locator = page.locator(HUAWEI_VERSION_XPATH)
+        developer_locator = page.locator(HUAWEI_DEVELOPER_XPATH)
         if version_locator.count() > 0:
             version = version_locator.first.inner_text().strip()
         if developer_locator.count() > 0:
@@ -459,77 +1133,119 @@ def click_title_get_detail_info(page, card_index: int):
     try:
         title_index = card_index * 2
         title_locator = page.locator("p[data-v-302a9de2]").nth(title_index)
-        element = title_locator.element_handle(timeout=5000)
+        with measured("Huawei AppGallery", "element"):
+            element = title_locator.element_handle(timeout=timeout_ms("Huawei AppGallery", "element"))
         if not element:
             logging.error("[click_title_get_detail_info] Не найден заголовок карточки")
             return "", "", ""
         logging.info(f"[click_title_get_detail_info] Нажимаем на заголовок карточки {card_index + 1}")
-        with page.expect_navigation(timeout=15000):
-            element.evaluate("el => el.click()")
-        page.wait_for_selector("div.appSingleInfo", timeout=15000)
+        with measured("Huawei AppGallery", "navigation"):
+            with page.expect_navigation(timeout=timeout_ms("Huawei AppGallery", "navigation")):
+                element.evaluate("el => el.click()")
+        _wait_ready(page, "Huawei AppGallery", selector="div.appSingleInfo")
         detail_url = page.url
         version, developer = extract_app_details(page)
-        page.go_back()
-        page.wait_for_selector("p[data-v-302a9de2]", timeout=15000)
-        time.sleep(2)
+        with measured("Huawei AppGallery", "navigation"):
+            page.go_back(timeout=timeout_ms("Huawei AppGallery", "navigation"))
+        _wait_ready(page, "Huawei AppGallery", selector="p[data-v-302a9de2]", network_idle=True)
         return detail_url, version, developer
     except Exception as e:
         logging.error(f"[click_title_get_detail_info] Ошибка при переходе: {e}")
         return "", "", ""
 
+# Функция открывает страницу приложения Huawei напрямую и возвращает (url, версия, разработчик)
+def open_huawei_detail(page):
+    _wait_ready(page, "Huawei AppGallery", selector="div.appSingleInfo")
+    version, developer = extract_app_details(page)
+    return page.url, version, developer
+
 # Функция для поиска приложений в Huawei AppGallery с использованием Playwright
-def search_huawei_appgallery(keyword, num_results=8):
-    search_url = f"https://appgallery.huawei.com/#/search/{keyword}"
+@store_search("Huawei AppGallery")
+def search_huawei_appgallery(keyword, num_results=8, pool=None, known=None):
+    try:
+        return run_in_browser(pool, _huawei_appgallery_worker, keyword, num_results, known)
+    except Exception as e:
+        logging.error(f"Ошибка парсинга Huawei AppGallery по '{keyword}': {e}")
+        report_failure("Huawei AppGallery", e)
+        return []
+
+def _huawei_appgallery_worker(session, keyword, num_results, known=None):
+    search_url = huawei_search_url(keyword)
     apps = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=["--disable-gpu", "--no-sandbox"])
-        context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-        page = context.new_page()
-        page.goto(search_url)
+    with session.context(store="Huawei AppGallery") as context:
+        page = session.new_page(context)
+        captured = _capture_responses(page, HUAWEI_API_PATTERN)
+        with measured("Huawei AppGallery", "goto"):
+            page.goto(search_url, timeout=timeout_ms("Huawei AppGallery", "goto"))
         try:
-            page.wait_for_selector("p[data-v-302a9de2]", timeout=15000)
+            has_cards = _wait_results(page, "Huawei AppGallery", "p[data-v-302a9de2]", captured, network_idle=True)
         except TimeoutError:
+            # Нет ни карточек, ни пустой выдачи, ни ответа API - ошибка магазина (для предохранителя)
             logging.error("[search_huawei_appgallery] Не удалось загрузить результаты поиска.")
-            browser.close()
+            raise
+        # Основной путь: записи из JSON, который страница загрузила сама
+        apps = _huawei_apps_from_json(_read_json_responses(captured), keyword, num_results)
+        if apps:
+            logging.info(f"[search_huawei_appgallery] Из ответов API получено записей: {len(apps)}")
+            # Страницы приложений открываем только для записей без версии или разработчика,
+            # кроме известных приложений
+            missing = [app for app in apps if not app["version"] or not app["developer"]]
+            known_urls = set()
+            for n, detail in _known_cards(known, "Huawei AppGallery", [(n, app["title"], app["developer"], app["url"]) for n, app in enumerate(missing)]).items():
+                # Без разработчика в записи известного приложения страницу все равно нужно открыть
+                if missing[n]["developer"] or detail["developer"]:
+                    missing[n]["version"] = missing[n]["version"] or detail["version"]
+                    missing[n]["developer"] = missing[n]["developer"] or detail["developer"]
+                    known_urls.add(missing[n]["url"])
+            missing = [app for app in missing if app["url"] not in known_urls]
+            visited = session.visit_pages(context, [app["url"] for app in missing], open_huawei_detail, platform="Huawei AppGallery")
+            for app, detail in zip(missing, visited):
+                if detail:
+                    app["url"] = detail[0]
+                    app["version"] = app["version"] or detail[1]
+                    app["developer"] = app["developer"] or detail[2]
+            for app in apps:
+                if app["url"] not in known_urls:
+                    get_version_cache().put("Huawei AppGallery", app["url"], app["version"])
             return apps
-        time.sleep(2)
-        elements = page.locator("p[data-v-302a9de2]")
-        total_elements = elements.count()
-        total_cards = total_elements // 2  # Каждый результат состоит из заголовка и описания
-        logging.info(f"[search_huawei_appgallery] Найдено карточек: {total_cards}")
-
-        for i in range(total_cards):
-            # Если число уникальных карточек достигло лимита, выходим из цикла
-            if len(apps) >= num_results:
-                break
-            try:
-                title = elements.nth(i * 2).inner_text().strip()
-                description = elements.nth(i * 2 + 1).inner_text().strip()
-                logging.info(f"[search_huawei_appgallery] Обрабатываем карточку {len(apps)+1}/{num_results}: '{title}'")
-                detail_url, version, developer = click_title_get_detail_info(page, i)
-                if not title or not detail_url:
-                    logging.info(f"[search_huawei_appgallery] Пропуск карточки {i+1}: недостаточно данных")
-                    continue
-                # Проверка уникальности по названию
-                if any(app.get("title") == title for app in apps):
-                    logging.info(f"[search_huawei_appgallery] Карточка '{title}' уже добавлена, пропускаем.")
-                    continue
-                app_data = {
-                    "platform": "Huawei AppGallery",
-                    "keyword": keyword,
-                    "title": title,
-                    "description": description,
-                    "detail_url": detail_url,
-                    "version": version,
-                    "developer": developer,
-                }
-                apps.append(app_data)
-            except Exception as e:
-                logging.error(f"[search_huawei_appgallery] Ошибка обработки карточки {i+1}: {e}")
+        if not has_cards:
+            logging.info(f"[search_huawei_appgallery] Ничего не найдено по '{keyword}'")
+            return apps
+        # Запасной путь: разбор карточек на странице
+        items = page.eval_on_selector_all("p[data-v-302a9de2]", _HUAWEI_TEXTS_JS)
+        selected = _select_huawei_cards(items, num_results)
+        # Известные приложения - по данным карточек, страницы остальных открываем
+        # напрямую, если ссылка есть в карточке
+        known_details = _known_cards(known, "Huawei AppGallery", [(i, title, "", href) for i, title, description, href in selected])
+        details = {i: (detail["url"], detail["version"], detail["developer"]) for i, detail in known_details.items()}
+        to_visit = [(i, href) for i, title, description, href in selected if href and i not in details]
+        visited = session.visit_pages(context, [href for _, href in to_visit], open_huawei_detail, platform="Huawei AppGallery")
+        for (i, href), detail in zip(to_visit, visited):
+            if detail:
+                details[i] = detail
+        # Остальные карточки открываем кликом по заголовку, как раньше
+        for i, title, description, href in selected:
+            if href or i in details:
                 continue
-
-        browser.close()
-        return apps
+            logging.info(f"[search_huawei_appgallery] Обрабатываем карточку {i+1}: '{title}'")
+            details[i] = click_title_get_detail_info(page, i)
+        for i, title, description, href in selected:
+            detail_url, version, developer = details.get(i, ("", "", ""))
+            if not detail_url:
+                logging.info(f"[search_huawei_appgallery] Пропуск карточки {i+1}: недостаточно данных")
+                continue
+            if i not in known_details:
+                get_version_cache().put("Huawei AppGallery", detail_url, version, aliases=(href,))
+            apps.append({
+                "platform": "Huawei AppGallery",
+                "keyword": keyword,
+                "title": title,
+                "description": description,
+                "url": detail_url,
+                "version": version,
+                "developer": developer,
+            })
+    return apps
 
 # Функция для сохранения результатов поиска в JSON-файл
 def save_results_to_json(results, filename="huawei_results.json"):
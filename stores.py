@@ -0,0 +1,200 @@
+import re
+import sys
+from urllib.parse import urlsplit
+
+# Реестр магазинов приложений: название, ключи конфигурации, возможности и лимиты.
+# Функции поиска регистрируются декораторами store_search / async_store_search
+# в search.py и async_engine.py, движки и статистика обходят реестр, а не списки магазинов.
+
+# Класс записи о приложении вместо словаря: слоты без __dict__, название магазина и
+# ключевое слово интернируются (одна строка на все записи), необязательные поля
+# (описание, рейтинг, цена) по умолчанию - пустая строка. Поля, которых нет в слотах,
+# сохраняются в extra, поэтому to_dict/from_dict переводят запись в JSON и обратно без потерь.
+# Методы get/[] позволяют работать с записью так же, как раньше со словарем.
+class AppRecord:
+    __slots__ = ("platform", "keyword", "title", "developer", "url", "version",
+                 "description", "rating", "price", "extra")
+    REQUIRED = ("platform", "keyword", "title", "developer", "url", "version")
+    OPTIONAL = ("description", "rating", "price")
+
+    def __init__(self, platform, keyword="", title="", developer="", url="", version="", **optional):
+        self.platform = sys.intern(platform)
+        self.keyword = sys.intern(keyword)
+        self.title = title
+        self.developer = developer
+        self.url = url
+        self.version = version
+        for name in self.OPTIONAL:
+            setattr(self, name, optional.pop(name, ""))
+        if optional:
+            self.extra = optional
+
+    # Ключ приложения в known_apps: "<магазин>::<ссылка>"
+    def unique_id(self):
+        return f"{self.platform}::{self.url}"
+
+    def get(self, name, default=None):
+        if name in self.__slots__ and name != "extra":
+            return getattr(self, name, default)
+        return getattr(self, "extra", {}).get(name, default)
+
+    def __getitem__(self, name):
+        value = self.get(name, KeyError)
+        if value is KeyError:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name, KeyError) is not KeyError
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.REQUIRED + self.OPTIONAL}
+        data.update(getattr(self, "extra", {}))
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __eq__(self, other):
+        return isinstance(other, AppRecord) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"AppRecord({self.platform!r}, {self.title!r}, {self.url!r}, {self.version!r})"
+
+# Класс описания магазина
+class StoreAdapter:
+    def __init__(self, name, enable_key, limit_key, default_limit, kind,
+                 batch_lookup=False, concurrency=2, rate=None, burst=1, hosts=(),
+                 app_url_pattern=None, app_url_format=None):
+        self.name = name
+        self.enable_key = enable_key            # флаг включения в конфигурации
+        self.limit_key = limit_key              # лимит результатов в конфигурации
+        self.default_limit = default_limit
+        self.kind = kind                        # "http" или "browser"
+        self.batch_lookup = batch_lookup        # магазин отдает данные пачкой по списку id
+        self.concurrency = concurrency          # одновременных вызовов магазина по умолчанию
+        self.rate = rate                        # начальная скорость, вызовов/с (None - по delay_range)
+        self.burst = burst                      # вызовов подряд без ожидания
+        self.hosts = hosts                      # хосты HTTP-запросов магазина (сигналы перегрузки)
+        # Ссылка на страницу приложения: шаблон с id приложения (разные формы одной ссылки)
+        # и единая форма, к которой они приводятся
+        self.app_url_pattern = re.compile(app_url_pattern) if app_url_pattern else None
+        self.app_url_format = app_url_format
+        self.search = None                      # search(keyword, num_results=..., proxies=/pool=, known=)
+        self.async_search = None                # метод AsyncStoreEngine(self, keyword)
+        self.lookup = None                      # lookup(urls, batch_size=..., proxies=) при batch_lookup
+
+    def enabled(self, config):
+        return config.get(self.enable_key, True)
+
+    def limit(self, config):
+        return config.get(self.limit_key, self.default_limit)
+
+    # Ссылка на страницу приложения по его id
+    def app_url(self, app_id):
+        return self.app_url_format.format(app_id)
+
+    # Ссылка на страницу приложения в единой форме (ссылки другого вида не меняются)
+    def canonical_app_url(self, url):
+        match = self.app_url_pattern.match(url or "") if self.app_url_pattern else None
+        return self.app_url(match.group(1)) if match else url
+
+    # Вызов поиска магазина: HTTP-магазинам передаются прокси, браузерным - пул браузеров
+    # и предикат известных приложений known (страницы таких приложений не открываются).
+    # Результаты приводятся к единой записи.
+    def run(self, keyword, num_results, proxies=None, pool=None, known=None):
+        if self.kind == "browser":
+            apps = self.search(keyword, num_results=num_results, pool=pool, known=known)
+        else:
+            apps = self.search(keyword, num_results=num_results, proxies=proxies)
+        return [normalize_record(app) for app in apps]
+
+STORES = [
+    StoreAdapter("Google Play", "enable_google_play", "max_results_google_play", 8, "http", concurrency=4,
+                 rate=1.0, burst=2, hosts=("play.google.com",)),
+    StoreAdapter("App Store", "enable_app_store", "max_results_app_store", 8, "http",
+                 batch_lookup=True, concurrency=4,
+                 rate=4.0, burst=4, hosts=("itunes.apple.com",)),
+    StoreAdapter("RuStore", "enable_rustore", "max_results_rustore", 20, "http", concurrency=4,
+                 rate=1.0, burst=2, hosts=("apps.rustore.ru",)),
+    StoreAdapter("Xiaomi Global Store", "enable_xiaomi_global", "max_results_xiaomi_global", 8, "browser"),
+    StoreAdapter("Xiaomi GetApps", "enable_xiaomi_getapps", "max_results_xiaomi_getapps", 8, "browser"),
+    StoreAdapter("Samsung Galaxy Store", "enable_galaxy_store", "max_results_samsung_galaxy", 27, "browser",
+                 app_url_pattern=r"https?://galaxystore\.samsung\.com/detail/([^/?#]+)",
+                 app_url_format="https://galaxystore.samsung.com/detail/{}"),
+    StoreAdapter("Huawei AppGallery", "enable_huawei_appgallery", "max_results_huawei_appgallery", 8, "browser",
+                 app_url_pattern=r"https?://appgallery\.huawei\.com/(?:#/)?app/([^/?#]+)",
+                 app_url_format="https://appgallery.huawei.com/app/{}")
+]
+STORE_NAMES = [store.name for store in STORES]
+# Магазины Xiaomi работают на одном сайте и могут опрашиваться в одном контексте браузера
+XIAOMI_STORES = {"Xiaomi Global Store", "Xiaomi GetApps"}
+_STORES_BY_NAME = {store.name: store for store in STORES}
+_STORES_BY_HOST = {host: store.name for store in STORES for host in store.hosts}
+
+def get_store(name):
+    return _STORES_BY_NAME[name]
+
+# Функция возвращает название магазина по хосту URL HTTP-запроса (None - хост не из реестра)
+def store_for_url(url):
+    return _STORES_BY_HOST.get(urlsplit(url or "").netloc)
+
+# Функция приводит ссылку на страницу приложения магазина к единой форме: одно приложение -
+# один ключ в known_apps и кеше версий, откуда бы ни пришла ссылка (JSON поиска, карточка,
+# адрес открытой страницы)
+def canonical_app_url(platform, url):
+    store = _STORES_BY_NAME.get(platform)
+    return store.canonical_app_url(url) if store else url
+
+# Ключ приложения в known_apps ("<магазин>::<ссылка>") с ссылкой в единой форме
+def canonical_unique_id(unique_id):
+    platform, separator, url = unique_id.partition("::")
+    return f"{platform}::{canonical_app_url(platform, url)}" if separator else unique_id
+
+# Функция возвращает включенные в конфигурации магазины в порядке реестра
+def enabled_stores(config):
+    return [store for store in STORES if store.enabled(config)]
+
+# Функция возвращает лимиты результатов по магазинам из конфигурации
+def store_limits(config):
+    return {store.name: store.limit(config) for store in STORES}
+
+# Счетчики по всем магазинам реестра с нулевыми значениями
+def empty_store_counts():
+    return dict.fromkeys(STORE_NAMES, 0)
+
+# Декоратор регистрирует синхронную функцию поиска магазина
+def store_search(name):
+    def register(func):
+        get_store(name).search = func
+        return func
+    return register
+
+# Декоратор регистрирует пакетную сверку магазина: lookup(urls, batch_size=, proxies=)
+# возвращает {ссылка приложения: запись с текущей версией}
+def store_lookup(name):
+    def register(func):
+        get_store(name).lookup = func
+        return func
+    return register
+
+# Декоратор регистрирует метод асинхронного движка для магазина
+def async_store_search(name):
+    def register(func):
+        get_store(name).async_search = func
+        return func
+    return register
+
+# Функция приводит запись магазина к AppRecord; ссылка на страницу приложения -
+# в "url" (прежнее "detail_url" переносится), в единой форме магазина
+def normalize_record(app):
+    if isinstance(app, AppRecord):
+        app.url = canonical_app_url(app.platform, app.url)
+        return app
+    data = dict(app)
+    detail_url = data.pop("detail_url", "")
+    if not data.get("url"):
+        data["url"] = detail_url
+    data["url"] = canonical_app_url(data.get("platform", ""), data["url"])
+    return AppRecord.from_dict(data)
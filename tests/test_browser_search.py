@@ -0,0 +1,126 @@
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from playwright.sync_api import TimeoutError
+
+import search
+from parser import ParserThread
+from version_cache import get_version_cache
+
+# Поддельная страница Playwright: селектор ожидания появляется, если на странице есть
+# карточки или отметка пустой выдачи, иначе ожидание заканчивается таймаутом
+class FakeLocator:
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+class FakePage:
+    url = "https://galaxystore.samsung.com/search?q=example"
+
+    def __init__(self, cards=0, empty_marker=False, records=None):
+        self.cards = cards
+        self.empty_marker = empty_marker
+        self.records = records or []
+
+    def wait_for_selector(self, selector, timeout=None):
+        if not self.cards and not self.empty_marker:
+            raise TimeoutError(f"Timeout {timeout}ms waiting for {selector}")
+
+    def wait_for_load_state(self, state, timeout=None):
+        pass
+
+    def locator(self, selector):
+        return FakeLocator(self.cards)
+
+    def on(self, event, handler):
+        pass
+
+    def eval_on_selector_all(self, selector, script):
+        return self.records
+
+    def goto(self, url, timeout=None):
+        pass
+
+# Поддельная сессия браузера: запоминает адреса страниц приложений, которые пришлось открыть
+class FakeSession:
+    def __init__(self, page):
+        self.page = page
+        self.visited = []
+
+    @contextmanager
+    def context(self, store=None, **kwargs):
+        yield "context"
+
+    def new_page(self, context):
+        return self.page
+
+    def visit_pages(self, context, urls, extract, platform=None):
+        self.visited.extend(urls)
+        return [None] * len(urls)
+
+@pytest.fixture
+def throttles(monkeypatch):
+    calls = []
+    monkeypatch.setattr(search, "report_throttle", lambda store, reason: calls.append((store, reason)))
+    return calls
+
+def test_wait_results_cards(throttles):
+    assert search._wait_results(FakePage(cards=3), "Samsung Galaxy Store", "li.MuiGridListTile-root") is True
+    assert throttles == []
+
+# Пустая выдача - не ошибка магазина: без таймаута и без снижения частоты
+def test_wait_results_empty_marker(throttles):
+    assert search._wait_results(FakePage(empty_marker=True), "Samsung Galaxy Store", "li.MuiGridListTile-root") is False
+    assert throttles == []
+
+def test_wait_results_api_answered(throttles):
+    page = FakePage()
+    assert search._wait_results(page, "Huawei AppGallery", "p[data-v-302a9de2]", captured=["response"]) is False
+    assert throttles == []
+
+def test_wait_results_timeout(throttles):
+    with pytest.raises(TimeoutError):
+        search._wait_results(FakePage(), "Huawei AppGallery", "p[data-v-302a9de2]", captured=[])
+    assert [store for store, _ in throttles] == ["Huawei AppGallery"]
+
+def test_empty_search_returns_no_apps(throttles):
+    page = FakePage(empty_marker=True)
+    assert search._xiaomi_global_collect(None, None, page, "редкое слово", 8) == []
+    assert search._xiaomi_getapps_collect(None, None, page, "редкое слово", 8) == []
+    assert throttles == []
+
+# Известное приложение Galaxy Store из ответа API (адрес по guid, а приложение проверялось
+# по имени пакета) сверяется по названию и разработчику, страница не открывается
+def test_known_galaxy_app_skips_visit_pages(monkeypatch):
+    store = "Samsung Galaxy Store"
+    known_url = "https://galaxystore.samsung.com/detail/com.example.app"
+    get_version_cache().put(store, known_url, "1.2.3")
+    parser = SimpleNamespace(
+        _card_urls={(store, "example app"): (known_url, "Example Dev")},
+        _known_apps={"group": {f"{store}::{known_url}": "1.2.3"}},
+        _known_lock=threading.Lock(),
+        _known_hits=0
+    )
+    known = lambda *args: ParserThread._known_fresh(parser, *args)
+    payload = {"data": [{"guid": "000123", "contentName": "Example App", "sellerName": "Example Dev"}]}
+    monkeypatch.setattr(search, "_read_json_responses", lambda captured: [payload])
+    session = FakeSession(FakePage(cards=1))
+    apps = search._galaxy_store_worker(session, "пример", 10, known)
+    assert session.visited == []
+    assert [(app["url"], app["version"]) for app in apps] == [(known_url, "1.2.3")]
+    assert parser._known_hits == 1
+
+# Карточка Xiaomi GetApps со ссылкой и свежей версией в кеше не открывается повторно
+def test_getapps_cached_card_skips_visit_pages():
+    store = "Xiaomi GetApps"
+    href = "https://global.app.mi.com/details?id=com.example.cached&lo=ID"
+    get_version_cache().put(store, href, "4.5.6")
+    records = [{"aria": "APP Name: Cached App, Developer: Example Dev", "href": href}]
+    session = FakeSession(None)
+    apps = search._xiaomi_getapps_collect(session, "context", FakePage(cards=1, records=records), "пример", 8)
+    assert session.visited == []
+    assert [(app["url"], app["version"]) for app in apps] == [(href, "4.5.6")]
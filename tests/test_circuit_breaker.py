@@ -0,0 +1,12 @@
+from circuit_breaker import run_tracked, report_failure
+
+# Ошибка, о которой функция поиска сообщила через report_failure, - не удачный вызов
+def test_run_tracked_on_success_only_without_failures():
+    successes = []
+    def failing():
+        report_failure("RuStore", RuntimeError("HTTP 503"))
+        return []
+    assert run_tracked(("RuStore",), failing, on_success=lambda: successes.append(1)) == []
+    assert successes == []
+    assert run_tracked(("RuStore",), lambda: ["app"], on_success=lambda: successes.append(1)) == ["app"]
+    assert successes == [1]
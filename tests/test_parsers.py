@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from search import (
+    parse_rustore_search, _parse_rustore_search_full,
+    fast_rustore_version, parse_rustore_version, _parse_rustore_version_full,
+    fast_google_play_version, parse_google_play_version, _parse_google_play_version_full
+)
+
+# Быстрые пути разбора (регулярные выражения, разбор только ссылок) должны давать
+# тот же результат, что и полный разбор страницы, на сохраненных страницах магазинов
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("name, version", [
+    ("rustore_app_itemprop.html", "3.14.2"),
+    ("rustore_app_ldjson.html", "5.0.1"),
+])
+def test_rustore_version_fast_matches_full(name, version):
+    html = _read(name)
+    assert fast_rustore_version(html) == version
+    assert _parse_rustore_version_full(html) == version
+    assert parse_rustore_version(html) == version
+
+def test_google_play_version_fast_matches_full():
+    html = _read("google_play_app.html")
+    assert fast_google_play_version(html) == "2.7.0"
+    assert _parse_google_play_version_full(html) == "2.7.0"
+    assert parse_google_play_version(html) == "2.7.0"
+
+def test_rustore_search_fast_matches_full():
+    html = _read("rustore_search.html")
+    fast = parse_rustore_search(html, "пример", 20)
+    assert len(fast) == 12
+    assert fast == _parse_rustore_search_full(html, "пример", 20)
+
+def test_rustore_search_respects_limit():
+    html = _read("rustore_search.html")
+    assert parse_rustore_search(html, "пример", 5) == _parse_rustore_search_full(html, "пример", 5)
+
+# Страница без известной разметки: быстрый путь пуст, результат - из полного разбора
+def test_version_fallback_to_full_parse():
+    html = "<html><body><div><p>Версия: 1.0.4</p></div></body></html>"
+    assert fast_rustore_version(html) == ""
+    assert parse_rustore_version(html) == _parse_rustore_version_full(html) == "1.0.4"
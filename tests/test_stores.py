@@ -0,0 +1,33 @@
+from stores import AppRecord, normalize_record
+
+RUSTORE_RECORD = {
+    "platform": "RuStore",
+    "keyword": "пример",
+    "title": "Пример",
+    "developer": "Разработчик",
+    "url": "https://apps.rustore.ru/app/com.example.app",
+    "version": "1.0.0",
+    "description": "",
+    "rating": "",
+    "price": "",
+}
+
+# Запись переводится в словарь и обратно без потерь, пустые поля сохраняются
+def test_app_record_round_trip():
+    record = AppRecord.from_dict(RUSTORE_RECORD)
+    assert record.to_dict() == RUSTORE_RECORD
+    assert record.get("description") == ""
+    assert record["rating"] == ""
+
+def test_app_record_extra_fields():
+    data = dict(RUSTORE_RECORD, downloads="1000+")
+    record = AppRecord.from_dict(data)
+    assert record.to_dict() == data
+    assert record.get("downloads") == "1000+"
+    assert "missing" not in record
+
+# Необязательные поля, которых не было в записи магазина, - пустые строки
+def test_app_record_optional_default():
+    record = normalize_record({"platform": "App Store", "title": "Пример", "url": "https://apps.apple.com/app/id1"})
+    assert record.get("description") == ""
+    assert record.to_dict()["price"] == ""
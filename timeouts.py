@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from stores import store_for_url
+
+# Адаптивные таймауты по магазинам: для каждого магазина и вида операции хранятся
+# последние длительности, таймаут - высокий перцентиль (timeout_percentile), умноженный
+# на timeout_multiplier, в пределах нижней и верхней границы вида операции. Пока
+# наблюдений меньше min_samples, действует значение по умолчанию.
+# Операции, прерванные ошибкой (таймаутом), тоже учитываются со своей длительностью,
+# поэтому в медленные дни таймаут растет, а не отрезает результаты.
+
+# Вид операции -> (по умолчанию, нижняя граница, верхняя граница), секунды
+TIMEOUT_KINDS = {
+    "http": (10, 3, 30),          # HTTP-запрос к магазину
+    "goto": (30, 8, 60),          # загрузка страницы поиска в браузере
+    "commit": (15, 5, 30),        # начало ответа страницы (переход без ожидания загрузки)
+    "selector": (15, 4, 30),      # появление селектора или состояние загрузки страницы
+    "idle": (5, 1, 10),           # затишье сети (только успешные ожидания)
+    "navigation": (15, 5, 30),    # переход по клику и возврат назад
+    "element": (5, 2, 10)         # появление элемента карточки
+}
+SAMPLE_SIZE = 200
+
+_settings = {
+    "enabled": True,
+    "percentile": 95,
+    "multiplier": 1.5,
+    "min_samples": 20,
+    "overrides": {}
+}
+_samples = {}
+_lock = threading.Lock()
+
+# Функция применяет настройки таймаутов из конфигурации. store_timeouts - переопределения
+# по магазинам: число - постоянный таймаут в секундах, словарь - свои default/floor/ceiling,
+# например {"Huawei AppGallery": {"goto": 45, "selector": {"ceiling": 40}}}
+def configure_timeouts(config):
+    with _lock:
+        _settings["enabled"] = bool(config.get("adaptive_timeouts", True))
+        _settings["percentile"] = float(config.get("timeout_percentile", 95))
+        _settings["multiplier"] = float(config.get("timeout_multiplier", 1.5))
+        _settings["min_samples"] = int(config.get("timeout_min_samples", 20))
+        _settings["overrides"] = dict(config.get("store_timeouts", {}))
+
+# Функция добавляет наблюдение длительности операции магазина (секунды)
+def observe(store, kind, seconds):
+    if not store:
+        return
+    with _lock:
+        samples = _samples.get((store, kind))
+        if samples is None:
+            samples = _samples[(store, kind)] = deque(maxlen=SAMPLE_SIZE)
+        samples.append(seconds)
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+# Функция возвращает таймаут операции магазина в секундах
+def timeout_for(store, kind):
+    default, floor, ceiling = TIMEOUT_KINDS[kind]
+    with _lock:
+        override = _settings["overrides"].get(store, {}).get(kind)
+        samples = list(_samples.get((store, kind), ()))
+        settings = dict(_settings)
+    if isinstance(override, (int, float)):
+        return float(override)
+    if isinstance(override, dict):
+        default = override.get("default", default)
+        floor = override.get("floor", floor)
+        ceiling = override.get("ceiling", ceiling)
+    if not settings["enabled"] or not store or len(samples) < settings["min_samples"]:
+        return float(default)
+    return float(min(ceiling, max(floor, _percentile(samples, settings["percentile"]) * settings["multiplier"])))
+
+# Таймаут в миллисекундах (для Playwright)
+def timeout_ms(store, kind):
+    return int(timeout_for(store, kind) * 1000)
+
+# Таймаут HTTP-запроса по URL (магазин определяется по хосту)
+def request_timeout(url):
+    return timeout_for(store_for_url(url), "http")
+
+# Контекст замера операции: длительность записывается и при успехе, и при ошибке
+# (censored=False - только при успехе, для ожиданий, таймаут которых не ошибка)
+@contextmanager
+def measured(store, kind, censored=True):
+    started = time.monotonic()
+    try:
+        yield
+    except Exception:
+        if censored:
+            observe(store, kind, time.monotonic() - started)
+        raise
+    observe(store, kind, time.monotonic() - started)
+
+# Функция возвращает текущие адаптированные таймауты (секунды) по магазинам
+# для видов операций, по которым набралось достаточно наблюдений
+def timeout_summary():
+    with _lock:
+        keys = [key for key, samples in _samples.items() if len(samples) >= _settings["min_samples"]]
+    summary = {}
+    for store, kind in sorted(keys):
+        summary.setdefault(store, {})[kind] = round(timeout_for(store, kind), 1)
+    return summary
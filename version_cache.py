@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from config import VERSION_CACHE_FILE
+from stores import canonical_app_url
+
+# Функция приводит URL приложения к каноническому виду для ключа кеша
+def canonical_url(url):
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, parts.fragment))
+
+# Класс кеша версий: platform + канонический URL -> версия и время проверки.
+# Свежие записи (моложе TTL магазина) позволяют не открывать страницу приложения.
+class VersionCache:
+    def __init__(self, path=VERSION_CACHE_FILE, ttl=None, default_ttl=3600):
+        self.path = path
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._cycle = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(platform, url):
+        return f"{platform}::{canonical_url(canonical_app_url(platform, url))}"
+
+    def ttl_for(self, platform):
+        return self.ttl.get(platform, self.default_ttl)
+
+    # Возвращает свежую запись {"version", "url", "checked_at"} или None
+    def lookup(self, platform, url):
+        ttl = self.ttl_for(platform)
+        if not url or ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(self._key(platform, url))
+        if entry and time.time() - entry.get("checked_at", 0) < ttl:
+            return entry
+        return None
+
+    # Возвращает версию, если она проверялась не раньше TTL магазина, иначе None
+    def get(self, platform, url):
+        entry = self.lookup(platform, url)
+        return entry.get("version", "") if entry else None
+
+    # Сохраняет версию; aliases - другие URL того же приложения (например, ссылка
+    # из карточки поиска, которая после перехода ведет на url)
+    def put(self, platform, url, version, aliases=()):
+        if not url or not version:
+            return
+        entry = {"version": version, "url": url, "checked_at": time.time()}
+        with self._lock:
+            for key_url in (url,) + tuple(aliases):
+                if key_url:
+                    self._entries[self._key(platform, key_url)] = entry
+            self._dirty = True
+
+    # Кеш текущего цикла: platform + ключ приложения (например, appId) -> версия, полученная
+    # в этом цикле, включая пустую (неудачный запрос не повторяется до следующего цикла).
+    # Действует независимо от TTL. None - в этом цикле приложение еще не запрашивалось.
+    def cycle_get(self, platform, key):
+        with self._lock:
+            return self._cycle.get(f"{platform}::{key}")
+
+    def cycle_put(self, platform, key, version):
+        with self._lock:
+            self._cycle[f"{platform}::{key}"] = version or ""
+
+    # Начало нового цикла опроса: кеш цикла очищается
+    def begin_cycle(self):
+        with self._lock:
+            self._cycle.clear()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self._entries = data if isinstance(data, dict) else {}
+        except Exception as e:
+            logging.error(f"Ошибка загрузки {self.path}: {e}")
+
+    # Сохраняет кеш на диск, предварительно удаляя записи старше максимального TTL
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            max_ttl = max([self.default_ttl] + list(self.ttl.values()))
+            now = time.time()
+            self._entries = {k: v for k, v in self._entries.items() if now - v.get("checked_at", 0) < max_ttl}
+            data = dict(self._entries)
+            self._dirty = False
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            logging.error(f"Ошибка сохранения {self.path}: {e}")
+
+# Класс объединения одновременных запросов (singleflight): вызовы с тем же ключом,
+# пришедшие, пока первый еще выполняется, ждут его и получают тот же результат
+class SingleFlight:
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    # Регистрирует вызов по ключу. Возвращает (вызов, True), если вызывающий - ведущий:
+    # он выполняет запрос и обязан вызвать finish; иначе (вызов, False) - ждать через wait.
+    def begin(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = SingleFlight._Call()
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    @staticmethod
+    def wait(call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    # Выполняет func() один раз на все одновременные вызовы с ключом key
+    def do(self, key, func):
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = func()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+# Ключ запроса страницы приложения для объединения: магазин и канонический URL
+def detail_key(platform, url):
+    return (platform, canonical_url(canonical_app_url(platform, url)))
+
+# Общий кеш версий, используемый функциями поиска
+_cache = VersionCache()
+# Запросы страниц приложений, выполняющиеся сейчас (по ключу detail_key)
+_detail_flights = SingleFlight()
+
+# Функция применяет настройки TTL из конфигурации и загружает кеш с диска
+def configure_version_cache(config):
+    _cache.ttl = dict(config.get("version_cache_ttl", {}))
+    _cache.default_ttl = config.get("version_cache_default_ttl", 3600)
+    _cache.load()
+
+def get_version_cache():
+    return _cache
+
+def get_detail_flights():
+    return _detail_flights